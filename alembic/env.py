@@ -15,6 +15,17 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Managed by APScheduler's job store, not by the models
+EXTERNAL_TABLES = {"apscheduler_jobs"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and name in EXTERNAL_TABLES:
+        return False
+    if type_ == "index" and object.table.name in EXTERNAL_TABLES:
+        return False
+    return True
+
 
 def get_url():
     return settings.DATABASE_URL
@@ -25,6 +36,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -45,7 +57,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,127 @@
+"""Streaks, notification schedules, leaderboards, friend groups and bot states
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.timeslots import default_notification_minute
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-user notification schedule
+    op.add_column('users', sa.Column('timezone', sa.String(), server_default='UTC', nullable=False))
+    op.add_column('users', sa.Column('notification_minute', sa.Integer(), nullable=True))
+
+    bind = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('telegram_id', sa.String),
+                     sa.column('notification_minute', sa.Integer))
+    rows = [
+        {'user_id': user_id, 'minute': default_notification_minute(telegram_id)}
+        for user_id, telegram_id in bind.execute(sa.select(users.c.id, users.c.telegram_id))
+    ]
+    if rows:
+        bind.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam('user_id'))
+            .values(notification_minute=sa.bindparam('minute')),
+            rows
+        )
+    op.alter_column('users', 'notification_minute', nullable=False)
+
+    # Streaks and the completion log
+    op.add_column('habits', sa.Column('last_completed_on', sa.Date(), nullable=True))
+    op.add_column('habits', sa.Column('current_streak', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('habits', sa.Column('best_streak', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_table(
+        'habit_completions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('habit_id', 'day', name='uq_habit_completions_habit_id_day')
+    )
+
+    # Leaderboards
+    op.create_table(
+        'leaderboard_entries',
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('display_name', sa.String(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('metric', 'position', name='pk_leaderboard_entries')
+    )
+    op.create_index('ix_leaderboard_entries_metric_user_id', 'leaderboard_entries', ['metric', 'user_id'],
+                    unique=True)
+
+    op.create_table(
+        'friend_groups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('invite_code', sa.String(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_friend_groups_id'), 'friend_groups', ['id'], unique=False)
+    op.create_index(op.f('ix_friend_groups_invite_code'), 'friend_groups', ['invite_code'], unique=True)
+
+    op.create_table(
+        'friend_group_members',
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['group_id'], ['friend_groups.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('group_id', 'user_id')
+    )
+    op.create_index(op.f('ix_friend_group_members_user_id'), 'friend_group_members', ['user_id'], unique=False)
+
+    # Bot conversation states
+    op.create_table(
+        'bot_states',
+        sa.Column('chat_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('state', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('chat_id')
+    )
+    op.create_index(op.f('ix_bot_states_expires_at'), 'bot_states', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_bot_states_expires_at'), table_name='bot_states')
+    op.drop_table('bot_states')
+    op.drop_index(op.f('ix_friend_group_members_user_id'), table_name='friend_group_members')
+    op.drop_table('friend_group_members')
+    op.drop_index(op.f('ix_friend_groups_invite_code'), table_name='friend_groups')
+    op.drop_index(op.f('ix_friend_groups_id'), table_name='friend_groups')
+    op.drop_table('friend_groups')
+    op.drop_index('ix_leaderboard_entries_metric_user_id', table_name='leaderboard_entries')
+    op.drop_table('leaderboard_entries')
+    op.drop_table('habit_completions')
+    op.drop_column('habits', 'best_streak')
+    op.drop_column('habits', 'current_streak')
+    op.drop_column('habits', 'last_completed_on')
+    op.drop_column('users', 'notification_minute')
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,37 @@
+"""Indexes for habit reads and the notification query
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pages of all of a user's habits
+    op.create_index('ix_habits_owner_id_id', 'habits', ['owner_id', 'id'], unique=False)
+    # Active habits of a user, and the notification join ordered by (owner_id, id)
+    op.create_index('ix_habits_active_owner_id_id', 'habits', ['owner_id', 'id'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+    # Due notification slots of active users
+    op.create_index('ix_users_notification_slot', 'users', ['notification_minute', 'timezone'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_notification_slot', table_name='users')
+    op.drop_index('ix_habits_active_owner_id_id', table_name='habits')
+    op.drop_index('ix_habits_owner_id_id', table_name='habits')
@@ -0,0 +1,46 @@
+"""Scheduler job store and checkpoints
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # APScheduler's SQLAlchemyJobStore table, same layout it would create itself
+    op.create_table(
+        'apscheduler_jobs',
+        sa.Column('id', sa.Unicode(length=191), nullable=False),
+        sa.Column('next_run_time', sa.Float(precision=25), nullable=True),
+        sa.Column('job_state', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_apscheduler_jobs_next_run_time'), 'apscheduler_jobs', ['next_run_time'], unique=False)
+
+    # Last minute each catch-up job has handled
+    op.create_table(
+        'scheduler_checkpoints',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheduler_checkpoints')
+    op.drop_index(op.f('ix_apscheduler_jobs_next_run_time'), table_name='apscheduler_jobs')
+    op.drop_table('apscheduler_jobs')
@@ -0,0 +1,48 @@
+"""Notification outbox
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('chat_id', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('chunks', sa.JSON(), nullable=False),
+        sa.Column('chunks_sent', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('status', sa.String(length=16), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chat_id', 'kind', 'day', name='uq_notification_outbox_chat_id_kind_day')
+    )
+    # Claim query: rows still to deliver whose next attempt, or expired lease, is due
+    op.create_index('ix_notification_outbox_claimable', 'notification_outbox', ['next_attempt_at'], unique=False,
+                    postgresql_where=sa.text("status IN ('pending', 'sending')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notification_outbox_claimable', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from db.session import get_db
-from schemas.habit import HabitCreate, HabitUpdate, HabitResponse, HabitCompletion
+from schemas.habit import (
+    HabitCreate,
+    HabitUpdate,
+    HabitResponse,
+    HabitCompletion,
+    HabitBatchCreate,
+    HabitCompletionBatch,
+    habit_list_adapter
+)
+from api.responses import ORJSONResponse, orjson_list_response
 from crud.crud_habit import habit_crud
+from core.config import settings
+from core.timeslots import local_today
 from api.deps import get_current_active_user
 from models.user import User
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -24,16 +36,82 @@ def create_habit(
     return habit
 
 
-@router.get("/", response_model=List[HabitResponse])
+@router.post(
+    "/batch",
+    response_model=List[HabitResponse],
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED
+)
+def create_habits_batch(
+        *,
+        db: Session = Depends(get_db),
+        batch_in: HabitBatchCreate,
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create several habits in one transaction
+    """
+    habits = habit_crud.create_many(db, objs_in=batch_in.habits, owner_id=current_user.id)
+    return orjson_list_response(habit_list_adapter, habits, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/complete-batch", response_model=List[HabitResponse], response_class=ORJSONResponse)
+def complete_habits_batch(
+        *,
+        db: Session = Depends(get_db),
+        batch_in: HabitCompletionBatch,
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Mark several habits as completed, e.g. completions synced from offline
+    """
+    today = local_today(current_user.timezone)
+    completions = [(item.habit_id, item.day or today) for item in batch_in.completions]
+    if any(day > today for _, day in completions):
+        raise HTTPException(
+            status_code=400,
+            detail="Completion day is in the future",
+        )
+
+    habits = habit_crud.get_many(
+        db, habit_ids=[habit_id for habit_id, _ in completions], owner_id=current_user.id
+    )
+    # Other users' habits are reported the same as ones that do not exist
+    missing = sorted({habit_id for habit_id, _ in completions} - habits.keys())
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Habits not found: {missing}",
+        )
+
+    habits = habit_crud.complete_many(db, habits=habits, completions=completions, today=today)
+    return orjson_list_response(habit_list_adapter, habits)
+
+
+@router.get("/", response_model=List[HabitResponse], response_class=ORJSONResponse)
 def read_habits(
+        limit: int = Query(settings.HABITS_PAGE_SIZE, ge=1, le=settings.HABITS_PAGE_MAX_SIZE),
+        cursor: Optional[int] = Query(None, description="X-Next-Cursor of the previous page"),
+        is_active: Optional[bool] = True,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
 ):
     """
-    Retrieve habits for current user
+    Retrieve a page of habits for current user, the next page cursor is in X-Next-Cursor
     """
-    habits = habit_crud.get_active_by_user(db, user_id=current_user.id)
-    return habits
+    habits, next_cursor = habit_crud.get_page(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        after_id=cursor,
+        is_active=is_active,
+        created_from=created_from,
+        created_to=created_to
+    )
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return orjson_list_response(habit_list_adapter, habits, headers=headers)
 
 
 @router.get("/{habit_id}", response_model=HabitResponse)
@@ -122,17 +200,22 @@ def complete_habit(
     """
     Mark habit as completed or not completed
     """
-    habit = habit_crud.get(db, habit_id=habit_id)
-    if not habit:
+    habit = habit_crud.mark_completed(
+        db,
+        habit_id=habit_id,
+        owner_id=current_user.id,
+        completed=completion.completed
+    )
+    if habit:
+        return habit
+
+    # Tell a missing habit from someone else's only on the failure path
+    if not habit_crud.get(db, habit_id=habit_id):
         raise HTTPException(
             status_code=404,
             detail="Habit not found",
         )
-    if habit.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=400,
-            detail="Not enough permissions",
-        )
-
-    habit = habit_crud.mark_completed(db, habit_id=habit_id, completed=completion.completed)
-    return habit
\ No newline at end of file
+    raise HTTPException(
+        status_code=400,
+        detail="Not enough permissions",
+    )
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from db.session import get_db
+from schemas.leaderboard import (
+    LeaderboardMetric,
+    LeaderboardResponse,
+    LeaderboardEntryResponse,
+    FriendGroupCreate,
+    FriendGroupResponse
+)
+from crud.crud_leaderboard import leaderboard_crud
+from crud.crud_friend_group import friend_group_crud
+from api.deps import get_current_active_user
+from models.user import User
+
+router = APIRouter()
+
+
+@router.post("/groups", response_model=FriendGroupResponse, status_code=status.HTTP_201_CREATED)
+def create_group(
+        *,
+        db: Session = Depends(get_db),
+        group_in: FriendGroupCreate,
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create friend group
+    """
+    return friend_group_crud.create(db, obj_in=group_in, owner_id=current_user.id)
+
+
+@router.post("/groups/join/{invite_code}", response_model=FriendGroupResponse)
+def join_group(
+        invite_code: str,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Join friend group by invite code
+    """
+    group = friend_group_crud.get_by_invite_code(db, invite_code=invite_code)
+    if not group:
+        raise HTTPException(
+            status_code=404,
+            detail="Group not found",
+        )
+    friend_group_crud.add_member(db, group_id=group.id, user_id=current_user.id)
+    return group
+
+
+@router.get("/groups/{group_id}/{metric}", response_model=LeaderboardResponse)
+def read_group_leaderboard(
+        group_id: int,
+        metric: LeaderboardMetric,
+        limit: int = Query(50, ge=1, le=100),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get leaderboard of a friend group
+    """
+    if not friend_group_crud.is_member(db, group_id=group_id, user_id=current_user.id):
+        raise HTTPException(
+            status_code=400,
+            detail="Not enough permissions",
+        )
+    entries = leaderboard_crud.get_group_top(db, metric, group_id=group_id, limit=limit)
+    me = leaderboard_crud.get_group_for_user(db, metric, group_id=group_id, user_id=current_user.id)
+    return LeaderboardResponse(
+        metric=metric,
+        entries=[LeaderboardEntryResponse.model_validate(entry) for entry in entries],
+        me=LeaderboardEntryResponse.model_validate(me) if me else None,
+        computed_at=entries[0].computed_at if entries else None
+    )
+
+
+@router.get("/{metric}", response_model=LeaderboardResponse)
+def read_leaderboard(
+        metric: LeaderboardMetric,
+        limit: int = Query(50, ge=1, le=100),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get global top and current user's rank
+    """
+    entries = leaderboard_crud.get_top(db, metric, limit=limit)
+    me = leaderboard_crud.get_for_user(db, metric, user_id=current_user.id)
+    return LeaderboardResponse(
+        metric=metric,
+        entries=[LeaderboardEntryResponse.model_validate(entry) for entry in entries],
+        me=LeaderboardEntryResponse.model_validate(me) if me else None,
+        computed_at=entries[0].computed_at if entries else None
+    )
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+from db.session import get_db
+from schemas.token import Token
+from crud.crud_user import user_crud
+from core.security import (
+    async_dummy_verify_password,
+    async_verify_and_update_password,
+    create_access_token,
+)
+
+router = APIRouter()
+
+
+@router.post("/access-token", response_model=Token)
+async def login_access_token(
+        db: Session = Depends(get_db),
+        form_data: OAuth2PasswordRequestForm = Depends()
+):
+    """
+    OAuth2 token login, the username is the telegram ID
+    """
+    user = await run_in_threadpool(user_crud.get_by_telegram_id, db, telegram_id=form_data.username)
+    if user is None or not user.hashed_password:
+        await async_dummy_verify_password()
+        raise HTTPException(status_code=400, detail="Incorrect telegram ID or password")
+
+    valid, new_hash = await async_verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Incorrect telegram ID or password")
+    if not user_crud.is_active(user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    if new_hash:
+        # Stored with an old work factor, upgrade it now that the plain password is at hand
+        await run_in_threadpool(user_crud.update_password_hash, db, db_obj=user, hashed_password=new_hash)
+
+    return Token(access_token=create_access_token(data={"sub": user.telegram_id}))
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from db.session import get_db
-from schemas.user import UserCreate, UserResponse, UserWithHabits
+from schemas.user import UserCreate, UserUpdate, UserResponse, UserWithHabits
+from crud.crud_habit import habit_crud
 from crud.crud_user import user_crud
+from core.config import settings
+from core.security import async_get_password_hash
 from api.deps import get_current_active_user
 from models.user import User
 
 router = APIRouter()
 
 
-@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(
-        *,
-        db: Session = Depends(get_db),
-        user_in: UserCreate
-):
-    """
-    Create new user
-    """
+def _with_habit_page(db: Session, user: User, response: Response) -> User:
+    """Load the first page of habits instead of the whole relationship"""
+    habits, next_cursor = habit_crud.get_page(db, user_id=user.id, limit=settings.HABITS_PAGE_SIZE)
+    set_committed_value(user, "habits", habits)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return user
+
+
+def _check_new_user(db: Session, user_in: UserCreate) -> None:
     user = user_crud.get_by_telegram_id(db, telegram_id=user_in.telegram_id)
     if user:
         raise HTTPException(
@@ -33,22 +39,46 @@ def create_user(
                 detail="The user with this email already exists in the system.",
             )
 
-    user = user_crud.create(db, obj_in=user_in)
-    return user
+
+def _check_email_change(db: Session, user_in: UserUpdate, current_user: User) -> None:
+    if user_in.email and user_in.email != current_user.email:
+        existing_user = user_crud.get_by_email(db, email=user_in.email)
+        if existing_user:
+            raise HTTPException(
+                status_code=400,
+                detail="User with this email already exists",
+            )
+
+
+@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def create_user(
+        *,
+        db: Session = Depends(get_db),
+        user_in: UserCreate
+):
+    """
+    Create new user
+    """
+    # Queries run in the threadpool, the hash in the password pool, so the loop never does either
+    await run_in_threadpool(_check_new_user, db, user_in)
+    hashed_password = await async_get_password_hash(user_in.password) if user_in.password else None
+    return await run_in_threadpool(user_crud.create, db, obj_in=user_in, hashed_password=hashed_password)
 
 
 @router.get("/me", response_model=UserWithHabits)
 def read_user_me(
+        response: Response,
+        db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get current user
+    Get current user with the first page of habits
     """
-    return current_user
+    return _with_habit_page(db, current_user, response)
 
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
         *,
         db: Session = Depends(get_db),
         user_in: UserUpdate,
@@ -57,26 +87,35 @@ def update_user_me(
     """
     Update own user
     """
-    if user_in.email and user_in.email != current_user.email:
-        existing_user = user_crud.get_by_email(db, email=user_in.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=400,
-                detail="User with this email already exists",
-            )
+    await run_in_threadpool(_check_email_change, db, user_in, current_user)
+    hashed_password = await async_get_password_hash(user_in.password) if user_in.password else None
+    return await run_in_threadpool(
+        user_crud.update, db, db_obj=current_user, obj_in=user_in, hashed_password=hashed_password
+    )
+
 
-    user = user_crud.update(db, db_obj=current_user, obj_in=user_in)
+@router.delete("/me", response_model=UserResponse)
+def deactivate_user_me(
+        *,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Deactivate own user
+    """
+    user = user_crud.deactivate(db, db_obj=current_user)
     return user
 
 
 @router.get("/{telegram_id}", response_model=UserWithHabits)
 def read_user_by_telegram_id(
         telegram_id: str,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get a specific user by telegram ID
+    Get a specific user by telegram ID with the first page of habits
     """
     user = user_crud.get_by_telegram_id(db, telegram_id=telegram_id)
     if not user:
@@ -84,4 +123,4 @@ def read_user_by_telegram_id(
             status_code=404,
             detail="The user with this telegram ID does not exist in the system",
         )
-    return user
\ No newline at end of file
+    return _with_habit_page(db, user, response)
\ No newline at end of file
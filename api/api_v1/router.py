@@ -1,6 +1,8 @@
 from fastapi import APIRouter
-from api.api_v1.endpoints import users, habits
+from api.api_v1.endpoints import login, users, habits, leaderboard
 
 api_router = APIRouter()
+api_router.include_router(login.router, prefix="/login", tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(habits.router, prefix="/habits", tags=["habits"])
\ No newline at end of file
+api_router.include_router(habits.router, prefix="/habits", tags=["habits"])
+api_router.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
\ No newline at end of file
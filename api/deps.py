@@ -1,15 +1,25 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from db.session import get_db
 from crud.crud_user import user_crud
+from core.cache import token_cache, user_cache
 from core.config import settings
 from models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/access-token")
 
 
+def _detached_copy(user: User) -> User:
+    """Copy of the row that belongs to no session and can be merged into any"""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
 def get_current_user(
         db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
@@ -20,20 +30,32 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        telegram_id: str = payload.get("sub")
-        if telegram_id is None:
+    telegram_id = token_cache.get(token)
+    if telegram_id is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            telegram_id: str = payload.get("sub")
+            if telegram_id is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+
+        # Never cache a token past its own expiry
+        expires_in = payload.get("exp", 0) - time.time()
+        token_cache.set(token, telegram_id, ttl=min(settings.AUTH_CACHE_TTL_SECONDS, expires_in))
+
+    cached_user = user_cache.get(telegram_id)
+    if cached_user is not None:
+        # Attach to this request's session without a SELECT
+        return db.merge(cached_user, load=False)
 
     user = user_crud.get_by_telegram_id(db, telegram_id=telegram_id)
     if user is None:
         raise credentials_exception
 
+    user_cache.set(telegram_id, _detached_copy(user))
     return user
 
 
@@ -43,4 +65,4 @@ def get_current_active_user(
     """Get current active authenticated user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
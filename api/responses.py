@@ -0,0 +1,23 @@
+from typing import Any, Iterable, Mapping, Optional
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, UTC datetimes end in Z like pydantic output"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def orjson_list_response(
+        adapter: TypeAdapter,
+        items: Iterable,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None
+) -> ORJSONResponse:
+    """Validate ORM rows with a prebuilt adapter and skip FastAPI's response encoding"""
+    content = adapter.dump_python(adapter.validate_python(list(items), from_attributes=True))
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,281 @@
+"""Benchmark harness.
+
+Runs against BENCH_DATABASE_URL (a sync SQLAlchemy URL of a scratch Postgres database,
+its asyncpg twin is derived) or a SQLite stand-in file when it is unset. Every
+benchmark records its median and p95 time; results go to benchmarks/results/latest.json.
+A benchmark fails when its median exceeds the stored baseline by more than the
+threshold. Timings only compare on the same machine, so no baseline is committed:
+record one with --bench-save-baseline where the gate runs, until then it is off.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+# Settings are read at import time, so defaults must be in place before app imports
+for name, value in {
+    "POSTGRES_USER": "bench",
+    "POSTGRES_PASSWORD": "bench",
+    "POSTGRES_DB": "bench",
+    "POSTGRES_HOST": "localhost",
+    "SECRET_KEY": "bench-secret",
+    "TELEGRAM_BOT_TOKEN": "123456:bench",
+    "TELEGRAM_BOT_USERNAME": "bench_bot",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from core.cache import habits_cache, user_id_cache, token_cache, user_cache
+from db import profiler
+from db.base import Base, User, Habit
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_PATH = BENCH_DIR / "results" / "latest.json"
+RECORDER_KEY = pytest.StashKey["BenchmarkRecorder"]()
+
+SEED_USERS = 200
+SEED_HABITS_PER_USER = 5
+BIG_USER_HABITS = 1000
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench")
+    group.addoption("--bench-rounds", type=int, default=int(os.getenv("BENCH_ROUNDS", "30")),
+                    help="timed rounds per benchmark")
+    group.addoption("--bench-threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "0.25")),
+                    help="allowed median slowdown against the baseline, 0.25 = 25%%")
+    group.addoption("--bench-save-baseline", action="store_true",
+                    help=f"write this run's results to {BASELINE_PATH.name}")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: benchmark needs PostgreSQL-only SQL")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Say when benchmarks ran without a baseline, so a disabled regression gate is not mistaken for a pass"""
+    recorder = config.stash.get(RECORDER_KEY, None)
+    if recorder is None or not recorder.results:
+        return
+    if config.getoption("--bench-save-baseline"):
+        terminalreporter.write_line(f"Saved {recorder.backend} baseline to {BASELINE_PATH}")
+        return
+
+    unchecked = sorted(set(recorder.results) - set(recorder.baseline))
+    if not unchecked:
+        return
+    terminalreporter.write_sep("-", "benchmark baseline")
+    if not recorder.baseline:
+        terminalreporter.write_line(
+            f"No {recorder.backend} baseline in {BASELINE_PATH.name}, the regression gate is off. "
+            f"Record one on this machine with: pytest --bench-save-baseline"
+        )
+    else:
+        terminalreporter.write_line(
+            f"{len(unchecked)} benchmarks have no {recorder.backend} baseline and were not checked: "
+            + ", ".join(unchecked)
+        )
+
+
+class BenchmarkRecorder:
+    """Collects timings of one run and compares them with the baseline"""
+
+    def __init__(self, backend: str, rounds: int, threshold: float):
+        self.backend = backend
+        self.rounds = rounds
+        self.threshold = threshold
+        self.results = {}
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        self.baseline = baseline.get(backend, {})
+
+    def record(self, name: str, timings: list) -> dict:
+        timings = sorted(timings)
+        result = {
+            "median_ms": round(statistics.median(timings) * 1000, 4),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 4),
+            "rounds": len(timings),
+        }
+        self.results[name] = result
+        return result
+
+    def regression(self, name: str) -> str:
+        """Failure message when the median regressed past the threshold"""
+        base = self.baseline.get(name)
+        if not base:
+            return ""
+        current = self.results[name]["median_ms"]
+        limit = base["median_ms"] * (1 + self.threshold)
+        if current > limit:
+            return (
+                f"{name}: median {current:.3f} ms exceeds baseline {base['median_ms']:.3f} ms "
+                f"by more than {self.threshold:.0%}"
+            )
+        return ""
+
+    def write(self, save_baseline: bool) -> None:
+        RESULTS_PATH.parent.mkdir(exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps({self.backend: self.results}, indent=2, sort_keys=True))
+        if save_baseline:
+            baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+            baseline[self.backend] = self.results
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+class Bench:
+    """Times a callable for one benchmark test"""
+
+    def __init__(self, recorder: BenchmarkRecorder, name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __call__(self, func, *args, setup=None, **kwargs):
+        """Time a sync callable; setup runs untimed before every round"""
+        timings = []
+        for round_ in range(self.recorder.rounds + 1):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func(*args, **kwargs)
+            if round_:  # the first round warms caches and statement compilation
+                timings.append(time.perf_counter() - started)
+        return self._finish(timings)
+
+    async def run_async(self, func, *args, setup=None, **kwargs):
+        """Time an async callable; setup runs untimed before every round"""
+        timings = []
+        for round_ in range(self.recorder.rounds + 1):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            await func(*args, **kwargs)
+            if round_:
+                timings.append(time.perf_counter() - started)
+        return self._finish(timings)
+
+    def _finish(self, timings: list) -> dict:
+        result = self.recorder.record(self.name, timings)
+        message = self.recorder.regression(self.name)
+        if message:
+            pytest.fail(message)
+        return result
+
+
+@pytest.fixture(scope="session")
+def database_urls():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return url, url.replace("+psycopg2", "+asyncpg").replace("postgresql://", "postgresql+asyncpg://")
+
+    path = Path(tempfile.mkdtemp()) / "bench.db"
+    return f"sqlite:///{path}", f"sqlite+aiosqlite:///{path}"
+
+
+@pytest.fixture(scope="session")
+def sync_engine(database_urls):
+    engine = create_engine(database_urls[0])
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def backend(sync_engine) -> str:
+    return sync_engine.dialect.name
+
+
+@pytest.fixture(scope="session")
+def recorder(request, backend):
+    config = request.config
+    recorder = BenchmarkRecorder(
+        backend,
+        rounds=config.getoption("--bench-rounds"),
+        threshold=config.getoption("--bench-threshold")
+    )
+    config.stash[RECORDER_KEY] = recorder
+    yield recorder
+    recorder.write(save_baseline=config.getoption("--bench-save-baseline"))
+
+
+@pytest.fixture
+def bench(request, recorder) -> Bench:
+    return Bench(recorder, request.node.name)
+
+
+@pytest.fixture(autouse=True)
+def skip_postgres_only(request, backend):
+    if request.node.get_closest_marker("postgres") and backend != "postgresql":
+        pytest.skip("needs PostgreSQL, set BENCH_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def session_factory(sync_engine):
+    return sessionmaker(bind=sync_engine, autocommit=False, autoflush=False)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_engine(database_urls, sync_engine):
+    engine = create_async_engine(database_urls[1])
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def async_session_factory(async_engine):
+    return async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def query_profiler(sync_engine, async_engine):
+    """Profile both engines, for query budget tests; timed benchmarks run without it"""
+    engines = (sync_engine, async_engine.sync_engine)
+    for engine in engines:
+        profiler.install(engine)
+    yield
+    for engine in engines:
+        profiler.uninstall(engine)
+
+
+@pytest.fixture(scope="session")
+def seed(session_factory):
+    """Users with a few habits each, plus one user with BIG_USER_HABITS habits"""
+    with session_factory() as db:
+        users = [User(telegram_id=str(100000 + i), username=f"user{i}") for i in range(SEED_USERS)]
+        big_user = User(telegram_id="999999", username="big")
+        db.add_all(users + [big_user])
+        db.flush()
+
+        db.add_all(
+            Habit(title=f"Habit {j}", description="seed", owner_id=user.id, completion_count=j)
+            for user in users
+            for j in range(SEED_HABITS_PER_USER)
+        )
+        db.add_all(
+            Habit(title=f"Big habit {j}", owner_id=big_user.id)
+            for j in range(BIG_USER_HABITS)
+        )
+        db.commit()
+        return {
+            "user_id": users[0].id,
+            "telegram_id": users[0].telegram_id,
+            "big_user_id": big_user.id,
+            "big_telegram_id": big_user.telegram_id,
+        }
+
+
+@pytest.fixture
+def clear_caches():
+    """Callable that empties the in-process caches, for cold-path rounds"""
+    def clear():
+        for cache in (habits_cache, user_id_cache, token_cache, user_cache):
+            cache.clear()
+    clear()
+    return clear
@@ -0,0 +1,88 @@
+"""Time of a 1k-habit list response through real routes, default response_model path vs orjson path.
+
+Run: python -m benchmarks.serialization [--habits 1000] [--rounds 50]
+"""
+import argparse
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.responses import ORJSONResponse, orjson_list_response
+from db.base import Habit
+from schemas.habit import HabitResponse, habit_list_adapter
+
+
+def make_habits(count: int):
+    """Transient ORM rows shaped like real ones"""
+    now = datetime.now(timezone.utc)
+    return [
+        Habit(
+            id=i,
+            title=f"Habit {i}",
+            description="Drink a glass of water after waking up",
+            is_active=True,
+            completion_count=i % 21,
+            current_streak=i % 7,
+            best_streak=i % 14,
+            last_completed=now,
+            last_completed_on=date.today() - timedelta(days=i % 3),
+            created_at=now - timedelta(days=30),
+            updated_at=now,
+            owner_id=1
+        )
+        for i in range(count)
+    ]
+
+
+def orjson_path(habits) -> bytes:
+    """Cached TypeAdapter validation rendered with orjson"""
+    return orjson_list_response(habit_list_adapter, habits).body
+
+
+def make_app(habits) -> FastAPI:
+    """Both routes as the habit endpoints declare them, returning the same rows"""
+    app = FastAPI()
+
+    @app.get("/default", response_model=List[HabitResponse])
+    def default_route():
+        return habits
+
+    @app.get("/orjson", response_model=List[HabitResponse], response_class=ORJSONResponse)
+    def orjson_route():
+        return orjson_list_response(habit_list_adapter, habits)
+
+    return app
+
+
+def measure(client: TestClient, path: str, rounds: int) -> float:
+    """Median milliseconds per request"""
+    client.get(path)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with TestClient(make_app(make_habits(args.habits))) as client:
+        identical = client.get("/default").content == client.get("/orjson").content
+        before = measure(client, "/default", args.rounds)
+        after = measure(client, "/orjson", args.rounds)
+
+    print(f"{args.habits} habits, median of {args.rounds} requests through TestClient")
+    print(f"  default (response_model):          {before:8.2f} ms")
+    print(f"  orjson  (TypeAdapter + orjson):    {after:8.2f} ms")
+    print(f"  speedup: {before / after:.2f}x, identical output: {'yes' if identical else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import itertools
+from datetime import date
+import pytest
+from crud.crud_habit import habit_crud, async_habit_crud
+from crud.crud_user import user_crud, async_user_crud
+from schemas.habit import HabitCreate
+from schemas.user import UserUpdate
+
+_counter = itertools.count()
+
+
+def test_habit_get_active_by_user(bench, session_factory, seed):
+    with session_factory() as db:
+        bench(habit_crud.get_active_by_user, db, user_id=seed["user_id"])
+
+
+def test_habit_get_page_big_user(bench, session_factory, seed):
+    with session_factory() as db:
+        bench(habit_crud.get_page, db, user_id=seed["big_user_id"], limit=50, after_id=500)
+
+
+def test_habit_create(bench, session_factory, seed):
+    with session_factory() as db:
+        bench(habit_crud.create, db, obj_in=HabitCreate(title="Bench habit"), owner_id=seed["user_id"])
+
+
+def test_habit_create_many_100(bench, session_factory, seed):
+    habits = [HabitCreate(title=f"Batch habit {i}") for i in range(100)]
+    with session_factory() as db:
+        bench(habit_crud.create_many, db, objs_in=habits, owner_id=seed["user_id"])
+
+
+@pytest.mark.postgres
+def test_habit_mark_completed(bench, session_factory, seed):
+    with session_factory() as db:
+        habit = habit_crud.create(db, obj_in=HabitCreate(title="Tap habit"), owner_id=seed["user_id"])
+        # Each round logs a new day, as the first tap of a day does
+        days = (date.fromordinal(date(2000, 1, 1).toordinal() + i) for i in itertools.count())
+        bench(
+            lambda: habit_crud.mark_completed(
+                db, habit_id=habit.id, owner_id=seed["user_id"], completed=True, day=next(days)
+            )
+        )
+
+
+def test_user_get_by_telegram_id(bench, session_factory, seed):
+    with session_factory() as db:
+        bench(user_crud.get_by_telegram_id, db, telegram_id=seed["telegram_id"])
+
+
+def test_user_update(bench, session_factory, seed):
+    with session_factory() as db:
+        user = user_crud.get_by_telegram_id(db, telegram_id=seed["telegram_id"])
+        bench(lambda: user_crud.update(db, db_obj=user, obj_in=UserUpdate(username=f"user{next(_counter)}")))
+
+
+async def test_async_habit_get_active_by_user(bench, async_session_factory, seed):
+    async with async_session_factory() as db:
+        await bench.run_async(async_habit_crud.get_active_by_user, db, user_id=seed["user_id"])
+
+
+async def test_async_user_get_by_telegram_id(bench, async_session_factory, seed):
+    async with async_session_factory() as db:
+        await bench.run_async(async_user_crud.get_by_telegram_id, db, telegram_id=seed["telegram_id"])
+
+
+async def test_async_stream_active_by_owner(bench, async_session_factory, seed):
+    async def consume():
+        async with async_session_factory() as db:
+            async for _ in async_habit_crud.stream_active_by_owner(db):
+                pass
+
+    await bench.run_async(consume)
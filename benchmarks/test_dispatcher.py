@@ -0,0 +1,86 @@
+import asyncio
+import itertools
+import random
+from collections import defaultdict
+from telebot.types import Update
+from bot.dispatcher import UpdateDispatcher
+
+_update_ids = itertools.count(1)
+
+
+def make_update(chat_id: int, text: str) -> Update:
+    update_id = next(_update_ids)
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+async def test_updates_of_one_chat_run_in_order():
+    seen = defaultdict(list)
+    running = defaultdict(int)
+    overlap = {"chats": 0, "same_chat": 0}
+
+    async def handler(update: Update) -> None:
+        chat_id = update.message.chat.id
+        running[chat_id] += 1
+        overlap["same_chat"] = max(overlap["same_chat"], running[chat_id])
+        overlap["chats"] = max(overlap["chats"], sum(1 for count in running.values() if count))
+        await asyncio.sleep(random.uniform(0, 0.003))
+        seen[chat_id].append(int(update.message.text))
+        running[chat_id] -= 1
+
+    dispatcher = UpdateDispatcher(handler, workers=4, max_pending=100)
+    for i in range(20):
+        for chat_id in (1, 2, 3):
+            await dispatcher.submit(make_update(chat_id, str(i)))
+    await dispatcher.stop()
+
+    assert {chat_id: numbers for chat_id, numbers in seen.items()} == {
+        chat_id: list(range(20)) for chat_id in (1, 2, 3)
+    }
+    assert overlap["same_chat"] == 1
+    assert overlap["chats"] > 1
+    assert dispatcher.processed == 60 and dispatcher.pending == 0
+
+
+async def test_failed_update_does_not_block_its_chat():
+    seen = []
+
+    async def handler(update: Update) -> None:
+        if update.message.text == "boom":
+            raise RuntimeError("handler failed")
+        seen.append(update.message.text)
+
+    dispatcher = UpdateDispatcher(handler, workers=2, max_pending=10)
+    for text in ("a", "boom", "b"):
+        await dispatcher.submit(make_update(1, text))
+    await dispatcher.stop()
+
+    assert seen == ["a", "b"]
+    assert dispatcher.failed == 1
+
+
+async def test_submit_waits_while_max_pending_are_queued():
+    release = asyncio.Event()
+
+    async def handler(update: Update) -> None:
+        await release.wait()
+
+    dispatcher = UpdateDispatcher(handler, workers=1, max_pending=2)
+    await dispatcher.submit(make_update(1, "a"))
+    await dispatcher.submit(make_update(2, "b"))
+    third = asyncio.create_task(dispatcher.submit(make_update(3, "c")))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    release.set()
+    await asyncio.wait_for(third, 1)
+    await dispatcher.stop()
+    assert dispatcher.processed == 3
@@ -0,0 +1,88 @@
+import itertools
+import pytest
+from telebot.types import CallbackQuery, Message
+from bot import handlers
+
+_message_ids = itertools.count(1)
+
+
+class StubBot:
+    """Counts outgoing Bot API calls instead of sending them"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def _call(self, *args, **kwargs):
+        self.calls += 1
+
+    send_message = edit_message_text = answer_callback_query = _call
+
+
+@pytest.fixture
+def stub_bot(monkeypatch, async_session_factory):
+    stub = StubBot()
+    monkeypatch.setattr(handlers, "bot", stub)
+    monkeypatch.setattr(handlers.habit_service, "session_factory", async_session_factory)
+    return stub
+
+
+def make_message(telegram_id: str, text: str) -> Message:
+    return Message.de_json({
+        "message_id": next(_message_ids),
+        "date": 0,
+        "chat": {"id": int(telegram_id), "type": "private"},
+        "from": {"id": int(telegram_id), "is_bot": False, "first_name": "Bench", "username": "bench"},
+        "text": text,
+    })
+
+
+def make_callback(telegram_id: str, data: str) -> CallbackQuery:
+    return CallbackQuery.de_json({
+        "id": str(next(_message_ids)),
+        "from": {"id": int(telegram_id), "is_bot": False, "first_name": "Bench"},
+        "chat_instance": "bench",
+        "data": data,
+        "message": make_message(telegram_id, "habit").json,
+    })
+
+
+async def test_start_command(bench, stub_bot, seed, clear_caches):
+    await bench.run_async(handlers.start_command, make_message(seed["telegram_id"], "/start"), setup=clear_caches)
+    assert stub_bot.calls
+
+
+async def test_show_user_habits_cold(bench, stub_bot, seed, clear_caches):
+    message = make_message(seed["telegram_id"], "📋 Мои привычки")
+    await bench.run_async(handlers.main_menu_handler, message, setup=clear_caches)
+
+
+async def test_show_user_habits_cached(bench, stub_bot, seed):
+    message = make_message(seed["telegram_id"], "📋 Мои привычки")
+    await bench.run_async(handlers.main_menu_handler, message)
+
+
+async def test_show_user_habits_big_user(bench, stub_bot, seed):
+    message = make_message(seed["big_telegram_id"], "📋 Мои привычки")
+    await bench.run_async(handlers.main_menu_handler, message)
+
+
+async def test_add_habit_flow(bench, stub_bot, seed):
+    menu = make_message(seed["telegram_id"], "➕ Добавить привычку")
+    title = make_message(seed["telegram_id"], "Read 10 pages")
+
+    async def flow():
+        await handlers.main_menu_handler(menu)
+        await handlers.add_habit_handler(title)
+
+    await bench.run_async(flow)
+
+
+async def test_show_settings(bench, stub_bot, seed):
+    await bench.run_async(handlers.main_menu_handler, make_message(seed["telegram_id"], "⚙️ Настройки"))
+
+
+@pytest.mark.postgres
+async def test_complete_habit_callback(bench, stub_bot, seed):
+    habits = await handlers.habit_service.get_user_habits(seed["user_id"])
+    call = make_callback(seed["telegram_id"], f"complete_yes:{habits[0].id}")
+    await bench.run_async(handlers.habit_callback_handler, call)
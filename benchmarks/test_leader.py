@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from notifications.leader import LeaderElection
+
+LOCK_KEY = 424242
+
+
+class FakeLocks:
+    """Advisory locks held by connections, released when the connection closes"""
+
+    def __init__(self):
+        self.holders = {}
+
+
+class FakeConnection:
+    def __init__(self, locks: FakeLocks):
+        self.locks = locks
+        self.broken = False
+
+    async def scalar(self, statement, params=None):
+        if self.broken:
+            raise ConnectionError("connection lost")
+        if "pg_try_advisory_lock" in str(statement):
+            holder = self.locks.holders.setdefault(params["key"], self)
+            return holder is self
+        return 1
+
+    def close(self) -> None:
+        for key, holder in list(self.locks.holders.items()):
+            if holder is self:
+                del self.locks.holders[key]
+
+
+class FakeEngine:
+    def __init__(self, locks: FakeLocks):
+        self.locks = locks
+        self.connections = []
+        self.reachable = True
+
+    def connect(self):
+        engine = self
+
+        class Connect:
+            async def __aenter__(self):
+                if not engine.reachable:
+                    raise ConnectionError("database unreachable")
+                connection = FakeConnection(engine.locks)
+                engine.connections.append(connection)
+                return connection
+
+            async def __aexit__(self, *exc_info):
+                engine.connections[-1].close()
+
+        return Connect()
+
+    async def dispose(self) -> None:
+        pass
+
+
+async def wait_until(condition, timeout: float = 1.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+def make_election(engine, events: list, name: str) -> LeaderElection:
+    election = LeaderElection(
+        LOCK_KEY,
+        on_elected=lambda: events.append((name, "elected")),
+        on_demoted=lambda: events.append((name, "demoted")),
+        retry_interval=0.01
+    )
+    election._engine = engine
+    return election
+
+
+async def test_one_leader_and_handover_on_stop():
+    locks, events = FakeLocks(), []
+    first = make_election(FakeEngine(locks), events, "first")
+    second = make_election(FakeEngine(locks), events, "second")
+
+    first.start()
+    await wait_until(lambda: first.is_leader)
+    second.start()
+    await asyncio.sleep(0.05)
+    assert not second.is_leader
+
+    await first.stop()
+    await wait_until(lambda: second.is_leader)
+    await second.stop()
+
+    assert events == [
+        ("first", "elected"), ("first", "demoted"),
+        ("second", "elected"), ("second", "demoted"),
+    ]
+
+
+async def test_lost_connection_demotes_and_hands_over():
+    locks, events = FakeLocks(), []
+    first_engine = FakeEngine(locks)
+    first = make_election(first_engine, events, "first")
+    second = make_election(FakeEngine(locks), events, "second")
+
+    first.start()
+    await wait_until(lambda: first.is_leader)
+    second.start()
+
+    # The database is gone for the first process, so it cannot win the lock back
+    first_engine.reachable = False
+    first_engine.connections[-1].broken = True
+    await wait_until(lambda: second.is_leader)
+    assert not first.is_leader
+    assert events[:3] == [("first", "elected"), ("first", "demoted"), ("second", "elected")]
+
+    await first.stop()
+    await second.stop()
+
+
+async def test_failing_on_elected_still_demotes():
+    locks = FakeLocks()
+    demoted = []
+
+    def on_elected():
+        raise RuntimeError("scheduler failed to start")
+
+    election = LeaderElection(LOCK_KEY, on_elected, lambda: demoted.append(True), retry_interval=0.01)
+    election._engine = FakeEngine(locks)
+    election.start()
+
+    await wait_until(lambda: demoted)
+    assert not election.is_leader
+    await election.stop()
+
+
+@pytest.mark.postgres
+async def test_advisory_lock_handover(database_urls):
+    def engine():
+        return create_async_engine(database_urls[1], poolclass=NullPool, isolation_level="AUTOCOMMIT")
+
+    events = []
+    first = make_election(engine(), events, "first")
+    second = make_election(engine(), events, "second")
+
+    first.start()
+    await wait_until(lambda: first.is_leader, timeout=5)
+    second.start()
+    await asyncio.sleep(0.1)
+    assert not second.is_leader
+
+    await first.stop()
+    await wait_until(lambda: second.is_leader, timeout=5)
+    await second.stop()
@@ -0,0 +1,112 @@
+import itertools
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.api_v1.endpoints import login
+from core.config import settings
+from core.security import decode_access_token, pwd_context, shutdown_password_pool
+from crud.crud_user import user_crud
+from db.session import get_db
+from schemas.user import UserCreate
+
+PASSWORD = "correct horse battery staple"
+_telegram_ids = itertools.count(700000)
+
+
+@pytest.fixture(scope="module")
+def client(session_factory):
+    app = FastAPI()
+    app.include_router(login.router, prefix="/login")
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    shutdown_password_pool()
+
+
+@pytest.fixture
+def make_user(session_factory):
+    def make(password: str = PASSWORD, is_active: bool = True):
+        with session_factory() as db:
+            user = user_crud.create(db, obj_in=UserCreate(telegram_id=str(next(_telegram_ids)), password=password))
+            if not is_active:
+                user_crud.deactivate(db, db_obj=user)
+            return user.telegram_id
+    return make
+
+
+def log_in(client: TestClient, telegram_id: str, password: str = PASSWORD):
+    return client.post("/login/access-token", data={"username": telegram_id, "password": password})
+
+
+def stored_hash(session_factory, telegram_id: str) -> str:
+    with session_factory() as db:
+        return user_crud.get_by_telegram_id(db, telegram_id=telegram_id).hashed_password
+
+
+def test_valid_login_returns_token(client, make_user):
+    telegram_id = make_user()
+
+    response = log_in(client, telegram_id)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token_type"] == "bearer"
+    assert decode_access_token(body["access_token"])["sub"] == telegram_id
+
+
+def test_wrong_password_is_rejected(client, make_user):
+    response = log_in(client, make_user(), password="wrong")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Incorrect telegram ID or password"
+
+
+def test_unknown_user_runs_dummy_verify(client, monkeypatch):
+    calls = []
+    dummy_verify = login.async_dummy_verify_password
+
+    async def counting_dummy_verify():
+        calls.append(True)
+        await dummy_verify()
+
+    monkeypatch.setattr(login, "async_dummy_verify_password", counting_dummy_verify)
+
+    response = log_in(client, "no-such-user")
+
+    assert response.status_code == 400
+    # Same answer as a wrong password, so the two cannot be told apart
+    assert response.json()["detail"] == "Incorrect telegram ID or password"
+    assert calls == [True]
+
+
+def test_inactive_user_is_rejected(client, make_user):
+    response = log_in(client, make_user(is_active=False))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_hash_with_lower_rounds_is_rewritten(client, make_user, session_factory):
+    telegram_id = make_user()
+    weak_hash = pwd_context.handler().using(rounds=4).hash(PASSWORD)
+    with session_factory() as db:
+        user = user_crud.get_by_telegram_id(db, telegram_id=telegram_id)
+        user_crud.update_password_hash(db, db_obj=user, hashed_password=weak_hash)
+
+    assert log_in(client, telegram_id).status_code == 200
+
+    new_hash = stored_hash(session_factory, telegram_id)
+    assert new_hash != weak_hash
+    assert new_hash.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+    assert pwd_context.verify(PASSWORD, new_hash)
+    # Already at the current work factor, so the next login leaves it alone
+    assert log_in(client, telegram_id).status_code == 200
+    assert stored_hash(session_factory, telegram_id) == new_hash
@@ -0,0 +1,176 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import delete, select
+from crud.crud_outbox import async_outbox_crud
+from models.notification_outbox import NotificationOutbox
+from notifications import outbox
+from notifications.outbox import OutboxWorker
+
+DAY = date(2026, 1, 1)
+
+
+async def messages(count: int, kind: str = "daily"):
+    for i in range(count):
+        yield {"chat_id": str(i), "kind": kind, "day": DAY, "chunks": ["first", "second"]}
+
+
+@pytest.fixture
+async def outbox_db(async_session_factory):
+    async with async_session_factory() as db:
+        await db.execute(delete(NotificationOutbox))
+        await db.commit()
+    return async_session_factory
+
+
+async def claim(session_factory, limit: int = 10, lease_seconds: int = 60):
+    async with session_factory() as db:
+        return await async_outbox_crud.claim(db, limit=limit, lease_seconds=lease_seconds)
+
+
+async def finish(session_factory, row, **values) -> bool:
+    async with session_factory() as db:
+        return await async_outbox_crud.finish(db, row, **values)
+
+
+@pytest.mark.postgres
+async def test_enqueue_is_once_per_chat_kind_and_day(outbox_db):
+    async with outbox_db() as db:
+        assert await async_outbox_crud.enqueue(db, messages(3), batch_size=2) == 3
+        assert await async_outbox_crud.enqueue(db, messages(3), batch_size=2) == 0
+        assert await async_outbox_crud.enqueue(db, messages(3, kind="weekly")) == 3
+
+
+@pytest.mark.postgres
+async def test_concurrent_claims_never_share_a_row(outbox_db):
+    async with outbox_db() as db:
+        await async_outbox_crud.enqueue(db, messages(10))
+
+    batches = await asyncio.gather(*(claim(outbox_db, limit=4) for _ in range(3)))
+    ids = [row.id for batch in batches for row in batch]
+
+    assert len(ids) == len(set(ids)) == 10
+    assert all(row.status == "sending" and row.attempts == 1 for batch in batches for row in batch)
+    assert await claim(outbox_db) == []
+
+
+@pytest.mark.postgres
+async def test_finished_row_is_not_claimed_again(outbox_db):
+    async with outbox_db() as db:
+        await async_outbox_crud.enqueue(db, messages(2))
+    sent, retried = await claim(outbox_db)
+
+    assert await finish(outbox_db, sent, status="sent", chunks_sent=2)
+    assert await finish(outbox_db, retried, status="pending", chunks_sent=1, retry_in=60, error="timeout",
+                        failed=True)
+    assert await claim(outbox_db) == []
+
+    async with outbox_db() as db:
+        rows = {row.id: row for row in await db.scalars(select(NotificationOutbox))}
+    assert rows[sent.id].status == "sent" and rows[sent.id].sent_at is not None
+    assert rows[retried.id].chunks_sent == 1 and rows[retried.id].last_error == "timeout"
+    assert rows[retried.id].failures == 1 and rows[sent.id].failures == 0
+
+
+@pytest.mark.postgres
+async def test_expired_lease_moves_the_row_to_another_worker(outbox_db):
+    async with outbox_db() as db:
+        await async_outbox_crud.enqueue(db, messages(1))
+
+    [stale] = await claim(outbox_db, lease_seconds=0)
+    [taken] = await claim(outbox_db, lease_seconds=60)
+
+    assert taken.id == stale.id and taken.attempts == stale.attempts + 1
+    # A lost lease is not a failed delivery
+    assert taken.failures == 0
+    # The first worker lost its lease, so its outcome must not overwrite the new owner's
+    assert not await finish(outbox_db, stale, status="sent", chunks_sent=2)
+    assert await finish(outbox_db, taken, status="sent", chunks_sent=2)
+
+
+class FakeSender:
+    concurrency = 2
+
+    def __init__(self, results):
+        self.results = results
+        self.sent = []
+        self.attempts = {}
+
+    async def deliver(self, message):
+        self.attempts[message.chat_id] = message.attempt
+        result, delay, delivered = self.results[message.chat_id]
+        self.sent.append((message.chat_id, message.chunks[:delivered]))
+        del message.chunks[:delivered]
+        return result, delay
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+def make_row(chat_id: str, attempts: int, failures: int = 0, chunks_sent: int = 0):
+    return SimpleNamespace(id=int(chat_id), chat_id=chat_id, chunks=["a", "b", "c"], chunks_sent=chunks_sent,
+                           attempts=attempts, failures=failures)
+
+
+@pytest.fixture
+def fake_outbox(monkeypatch):
+    """Serve the given rows to claim and collect what finish records"""
+    state = {"rows": [], "finished": {}}
+
+    async def fake_claim(db, *, limit, lease_seconds):
+        return state["rows"]
+
+    async def fake_finish(db, row, **values):
+        state["finished"][row.chat_id] = values
+        return True
+
+    monkeypatch.setattr(outbox.async_outbox_crud, "claim", fake_claim)
+    monkeypatch.setattr(outbox.async_outbox_crud, "finish", fake_finish)
+    return state
+
+
+async def test_worker_outcomes(fake_outbox):
+    fake_outbox["rows"] = [
+        make_row("1", attempts=1, chunks_sent=1),
+        make_row("2", attempts=1),
+        make_row("3", attempts=4, failures=3),
+        make_row("4", attempts=9),
+    ]
+    finished = fake_outbox["finished"]
+    sender = FakeSender({
+        "1": ("sent", None, 2),
+        "2": ("retry", 2, 1),
+        "3": ("retry", 8, 0),
+        "4": ("throttled", 30, 0),
+    })
+    worker = OutboxWorker(sender, session_factory=FakeSession, batch_size=10, max_retries=3)
+
+    assert await worker.run_once() == 4
+    # Sending resumes after the chunks an earlier attempt delivered
+    assert ("1", ["b", "c"]) in sender.sent
+    assert finished["1"] == {"status": "sent", "chunks_sent": 3, "retry_in": None, "error": None, "failed": False}
+    assert finished["2"]["status"] == "pending" and finished["2"]["chunks_sent"] == 1
+    assert finished["2"]["retry_in"] == 2 and finished["2"]["failed"]
+    assert finished["3"]["status"] == "failed"
+    # Rate limiting never counts against the row, however often it was tried
+    assert finished["4"]["status"] == "pending" and finished["4"]["retry_in"] == 30
+    assert not finished["4"]["failed"]
+
+
+async def test_throttled_row_is_retried_from_the_first_backoff(fake_outbox):
+    # Five leases ended in 429 before this one, none of them a failure
+    fake_outbox["rows"] = [make_row("1", attempts=6)]
+    sender = FakeSender({"1": ("retry", 1, 0)})
+    worker = OutboxWorker(sender, session_factory=FakeSession, batch_size=10, max_retries=1)
+
+    await worker.run_once()
+
+    assert sender.attempts["1"] == 0
+    finished = fake_outbox["finished"]["1"]
+    assert finished["status"] == "pending" and finished["retry_in"] == 1 and finished["failed"]
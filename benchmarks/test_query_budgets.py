@@ -0,0 +1,67 @@
+import pytest
+from fastapi import Response
+from api.api_v1.endpoints.users import _with_habit_page
+from core.config import settings
+from crud.crud_habit import habit_crud, async_habit_crud
+from crud.crud_user import user_crud
+from db.profiler import assert_max_queries, profile_scope
+from schemas.user import UserWithHabits
+from services.habit_service import HabitService
+
+pytestmark = pytest.mark.usefixtures("query_profiler")
+
+
+@pytest.fixture
+def service(async_session_factory):
+    return HabitService(session_factory=async_session_factory)
+
+
+def test_profiler_flags_repeated_statements(session_factory, seed):
+    with session_factory() as db, profile_scope("loop", report=False) as profile:
+        for i in range(6):
+            user_crud.get_by_telegram_id(db, telegram_id=str(100000 + i))
+
+    [(statement, times, call_site)] = profile.repeated(threshold=5)
+    assert times == 6
+    assert "test_query_budgets.py" in call_site
+
+
+def test_habit_page_is_one_query(session_factory, seed):
+    with session_factory() as db, assert_max_queries(1):
+        habits, next_cursor = habit_crud.get_page(db, user_id=seed["big_user_id"], limit=50)
+
+    assert len(habits) == 50
+    assert {habit.owner_id for habit in habits} == {seed["big_user_id"]}
+    assert next_cursor == habits[-1].id
+
+
+def test_user_with_habits_does_not_lazy_load(session_factory, seed):
+    with session_factory() as db:
+        user = user_crud.get_by_telegram_id(db, telegram_id=seed["big_telegram_id"])
+        with assert_max_queries(1):
+            response = UserWithHabits.model_validate(_with_habit_page(db, user, Response()))
+
+    assert len(response.habits) == settings.HABITS_PAGE_SIZE
+
+
+async def test_bot_habit_list_cold_then_cached(service, seed, clear_caches):
+    with assert_max_queries(2):
+        user_id = await service.get_user_id(seed["telegram_id"])
+        habits = await service.get_user_habits(user_id)
+
+    with assert_max_queries(0):
+        cached_user_id = await service.get_user_id(seed["telegram_id"])
+        cached_habits = await service.get_user_habits(user_id)
+
+    assert user_id == cached_user_id == seed["user_id"]
+    assert habits and [habit.id for habit in cached_habits] == [habit.id for habit in habits]
+
+
+async def test_notification_stream_is_one_query(async_session_factory, seed):
+    async with async_session_factory() as db:
+        with assert_max_queries(1):
+            groups = [(owner, habits) async for owner, habits in async_habit_crud.stream_active_by_owner(db)]
+
+    assert len(groups) > 1
+    assert all(habits for _, habits in groups)
+    assert len({owner.telegram_id for owner, _ in groups}) == len(groups)
@@ -0,0 +1,42 @@
+import pytest
+from benchmarks.serialization import make_habits, orjson_path
+from bot.templates import HABIT_LIST, TELEGRAM_MESSAGE_LIMIT, pack, utf16_len
+from core.cache import rendered_cache
+from services.notification_service import notification_service
+
+
+@pytest.mark.parametrize("count", [5, 50])
+def test_format_daily_notification(bench, count):
+    habits = make_habits(count)
+    bench(notification_service._format_daily_notification, habits)
+
+
+def test_habit_list_render_cold(bench):
+    habits = make_habits(50)
+    bench(HABIT_LIST.render, habits, setup=rendered_cache.clear)
+
+
+def test_habit_list_render_cached(bench):
+    habits = make_habits(50)
+    bench(HABIT_LIST.render, habits)
+
+
+def test_habit_list_response_1k(bench):
+    habits = make_habits(1000)
+    bench(orjson_path, habits)
+
+
+def test_long_notification_is_split_between_habits():
+    chunks = notification_service._format_daily_notification(make_habits(200))
+
+    assert len(chunks) > 1
+    assert all(utf16_len(chunk) <= TELEGRAM_MESSAGE_LIMIT for chunk in chunks)
+    assert chunks[1].startswith(tuple(f"{i}. " for i in range(1, 201)))
+    assert chunks[-1].endswith("ключ к успеху!")
+
+
+def test_oversized_block_is_split_without_breaking_surrogates():
+    chunks = pack(["🔥" * 5000], limit=TELEGRAM_MESSAGE_LIMIT)
+
+    assert [utf16_len(chunk) for chunk in chunks] == [4096, 4096, 1808]
+    assert "".join(chunks) == "🔥" * 5000
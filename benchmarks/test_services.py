@@ -0,0 +1,46 @@
+import pytest
+from schemas.leaderboard import LeaderboardMetric
+from services.habit_service import HabitService
+
+
+@pytest.fixture
+def service(async_session_factory):
+    return HabitService(session_factory=async_session_factory)
+
+
+async def test_get_user_habits_cold(bench, service, seed, clear_caches):
+    await bench.run_async(service.get_user_habits, seed["user_id"], setup=clear_caches)
+
+
+async def test_get_user_habits_cached(bench, service, seed):
+    await bench.run_async(service.get_user_habits, seed["user_id"])
+
+
+async def test_get_user_habits_big_user_cold(bench, service, seed, clear_caches):
+    await bench.run_async(service.get_user_habits, seed["big_user_id"], setup=clear_caches)
+
+
+async def test_get_user_id_cold(bench, service, seed, clear_caches):
+    await bench.run_async(service.get_user_id, seed["telegram_id"], setup=clear_caches)
+
+
+async def test_get_active_habits_count_cold(bench, service, seed, clear_caches):
+    await bench.run_async(service.get_active_habits_count, seed["telegram_id"], setup=clear_caches)
+
+
+async def test_create_habit(bench, service, seed):
+    await bench.run_async(service.create_habit, user_id=seed["user_id"], title="Service habit", description="")
+
+
+@pytest.mark.postgres
+async def test_mark_habit_completed_repeat_tap(bench, service, seed):
+    habit = await service.create_habit(user_id=seed["user_id"], title="Tap habit", description="")
+    await service.mark_habit_completed(habit.id, seed["user_id"], True)
+    # Later taps on the same day: the insert conflicts and the owned-habit read answers
+    await bench.run_async(service.mark_habit_completed, habit.id, seed["user_id"], True)
+
+
+@pytest.mark.postgres
+async def test_get_leaderboard(bench, service, seed):
+    await service.process_daily_habits()
+    await bench.run_async(service.get_leaderboard, seed["user_id"], LeaderboardMetric.completions)
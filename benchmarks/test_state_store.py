@@ -0,0 +1,82 @@
+import pytest
+from core import cache
+from bot.state_store import MemoryStateStore, PostgresStateStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Only the cache module sees it, the event loop keeps the real clock
+    monkeypatch.setattr(cache, "time", fake)
+    return fake
+
+
+async def test_memory_state_expires_after_ttl(clock):
+    store = MemoryStateStore(ttl=60, max_size=10)
+    await store.set(1, "waiting_for_title")
+
+    clock.now += 59
+    assert await store.get(1) == "waiting_for_title"
+
+    clock.now += 1
+    assert await store.get(1) is None
+
+
+async def test_memory_state_set_restarts_ttl(clock):
+    store = MemoryStateStore(ttl=60, max_size=10)
+    await store.set(1, "waiting_for_title")
+    clock.now += 50
+    await store.set(1, "waiting_for_description")
+
+    clock.now += 50
+    assert await store.get(1) == "waiting_for_description"
+
+
+async def test_memory_purge_drops_only_expired_states(clock):
+    store = MemoryStateStore(ttl=60, max_size=10)
+    await store.set(1, "a")
+    clock.now += 30
+    await store.set(2, "b")
+    clock.now += 30
+
+    assert await store.purge_expired() == 1
+    assert await store.get(1) is None
+    assert await store.get(2) == "b"
+
+
+async def test_memory_store_evicts_least_recently_used_chat(clock):
+    store = MemoryStateStore(ttl=60, max_size=2)
+    await store.set(1, "a")
+    await store.set(2, "b")
+    # Reading chat 1 makes chat 2 the least recently used
+    assert await store.get(1) == "a"
+    await store.set(3, "c")
+
+    assert await store.get(2) is None
+    assert await store.get(1) == "a"
+    assert await store.get(3) == "c"
+
+
+@pytest.mark.postgres
+async def test_postgres_state_expires_after_ttl(async_session_factory):
+    live = PostgresStateStore(ttl=60, session_factory=async_session_factory)
+    expired = PostgresStateStore(ttl=-1, session_factory=async_session_factory)
+    await live.set(1, "a")
+    await expired.set(2, "b")
+
+    assert await live.get(1) == "a"
+    assert await live.get(2) is None
+    assert await live.purge_expired() == 1
+
+    # Setting again replaces the state and its expiry
+    await expired.set(1, "c")
+    assert await live.get(1) is None
+    await live.delete(1)
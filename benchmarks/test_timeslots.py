@@ -0,0 +1,45 @@
+import itertools
+from datetime import date, datetime, timezone
+from core.cache import timezones_cache
+from core.timeslots import due_slot_days
+from crud.crud_user import async_user_crud
+from schemas.user import UserCreate, UserUpdate
+
+_telegram_ids = itertools.count(800000)
+
+
+def test_ordinary_minute_maps_to_one_local_minute():
+    now = datetime(2026, 3, 28, 1, 30, tzinfo=timezone.utc)
+
+    assert due_slot_days([now], ["Europe/Berlin"]) == {("Europe/Berlin", 150): date(2026, 3, 28)}
+
+
+def test_spring_forward_gap_is_due_after_the_jump():
+    # 01:00 UTC on 2026-03-29 is 03:00 in Berlin; 02:00-02:59 local never happens that day
+    now = datetime(2026, 3, 29, 1, 0, tzinfo=timezone.utc)
+
+    slot_days = due_slot_days([now], ["Europe/Berlin"])
+
+    assert slot_days[("Europe/Berlin", 180)] == date(2026, 3, 29)
+    assert slot_days[("Europe/Berlin", 150)] == date(2026, 3, 29)
+    assert len(slot_days) == 61
+
+
+def test_minute_before_the_gap_has_no_extra_slots():
+    now = datetime(2026, 3, 29, 0, 59, tzinfo=timezone.utc)
+
+    assert due_slot_days([now], ["Europe/Berlin"]) == {("Europe/Berlin", 119): date(2026, 3, 29)}
+
+
+async def test_timezone_change_refreshes_the_cached_list(async_session_factory):
+    async with async_session_factory() as db:
+        user = await async_user_crud.create(db, obj_in=UserCreate(telegram_id=str(next(_telegram_ids)), password="secret"))
+        timezones_cache.clear()
+        before = await async_user_crud.get_timezones(db)
+        assert "Pacific/Chatham" not in before
+
+        await async_user_crud.update(db, db_obj=user, obj_in=UserUpdate(notification_time="09:00"))
+        assert timezones_cache.get("active") is not None
+
+        await async_user_crud.update(db, db_obj=user, obj_in=UserUpdate(timezone="Pacific/Chatham"))
+        assert "Pacific/Chatham" in await async_user_crud.get_timezones(db)
@@ -1,35 +1,113 @@
+from telebot import asyncio_helper
 from telebot.async_telebot import AsyncTeleBot
+from telebot.types import Update
+from bot.dispatcher import UpdateDispatcher
 from core.config import settings
+from core.metrics import track_telegram_api
+from db.profiler import profile_scope
 import asyncio
-from typing import Optional
+from contextlib import suppress
+from typing import List, Optional
 
-bot = AsyncTeleBot(settings.TELEGRAM_BOT_TOKEN)
+
+class DispatchingTeleBot(AsyncTeleBot):
+    """AsyncTeleBot that hands updates to a per-chat ordered dispatcher"""
+
+    def __init__(self, token: str, **kwargs):
+        super().__init__(token, **kwargs)
+        self.dispatcher = UpdateDispatcher(self._handle_update)
+
+    async def process_new_updates(self, updates: List[Update]):
+        for update in updates:
+            await self.dispatcher.submit(update)
+
+    async def _handle_update(self, update: Update):
+        with profile_scope(f"update {update.update_id}"):
+            await super().process_new_updates([update])
+
+
+if settings.TELEGRAM_API_URL:
+    # A self-hosted Bot API server or the load test stand-in
+    asyncio_helper.API_URL = f"{settings.TELEGRAM_API_URL.rstrip('/')}/bot{{0}}/{{1}}"
+
+# Every Bot API method goes through _process_request
+asyncio_helper._process_request = track_telegram_api(asyncio_helper._process_request)
+
+bot = DispatchingTeleBot(settings.TELEGRAM_BOT_TOKEN)
 _bot_task: Optional[asyncio.Task] = None
+_handlers_registered = False
+
+
+def _register_handlers_once():
+    """Register handlers once per process"""
+    global _handlers_registered
+    from bot.handlers import register_handlers
+
+    if not _handlers_registered:
+        register_handlers()
+        _handlers_registered = True
+
+
+async def start_bot():
+    """Start the bot in webhook or polling mode"""
+    bot.dispatcher.start()
+    if settings.TELEGRAM_USE_WEBHOOK:
+        await start_bot_webhook()
+    else:
+        await start_bot_polling()
 
 
 async def start_bot_polling():
     """Start the bot polling"""
     global _bot_task
-    from bot.handlers import register_handlers
 
     # Register handlers
-    register_handlers()
+    _register_handlers_once()
+
+    # Polling and a webhook are mutually exclusive on Telegram's side
+    await bot.remove_webhook()
 
     # Start polling
     _bot_task = asyncio.create_task(bot.polling(non_stop=True))
     print("Bot polling started")
 
 
+async def start_bot_webhook():
+    """Register the webhook, updates then arrive through the FastAPI app"""
+    if not settings.TELEGRAM_WEBHOOK_URL or not settings.TELEGRAM_WEBHOOK_SECRET:
+        raise RuntimeError("TELEGRAM_WEBHOOK_URL and TELEGRAM_WEBHOOK_SECRET are required in webhook mode")
+
+    _register_handlers_once()
+
+    # Every worker sets the same URL, so concurrent calls are harmless
+    await bot.set_webhook(
+        url=f"{settings.TELEGRAM_WEBHOOK_URL.rstrip('/')}{settings.TELEGRAM_WEBHOOK_PATH}",
+        secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+        max_connections=settings.TELEGRAM_WEBHOOK_MAX_CONNECTIONS
+    )
+    print("Bot webhook registered")
+
+
+async def process_webhook_update(payload: dict):
+    """Pass one webhook update to the handlers"""
+    update = Update.de_json(payload)
+    await bot.process_new_updates([update])
+
+
 async def stop_bot():
     """Stop the bot polling"""
     global _bot_task
     if _bot_task:
-        bot.stop_polling()
-        await _bot_task
+        # AsyncTeleBot has no stop_polling, the polling task is cancelled instead
+        _bot_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _bot_task
         _bot_task = None
         print("Bot polling stopped")
 
+    await bot.dispatcher.stop()
+
 
 def get_bot() -> AsyncTeleBot:
     """Get bot instance"""
-    return bot
\ No newline at end of file
+    return bot
@@ -0,0 +1,187 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+from telebot.types import Update
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Update parts that carry a chat, in the order they are checked
+CHAT_UPDATE_FIELDS = (
+    "message",
+    "edited_message",
+    "channel_post",
+    "edited_channel_post",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+)
+
+# Update parts that only carry a user
+USER_UPDATE_FIELDS = (
+    "inline_query",
+    "chosen_inline_result",
+    "shipping_query",
+    "pre_checkout_query",
+)
+
+
+def chat_key(update: Update) -> Hashable:
+    """Key that orders updates: chat id, user id, or the update itself"""
+    for field in CHAT_UPDATE_FIELDS:
+        part = getattr(update, field, None)
+        if part is not None:
+            return part.chat.id
+
+    callback_query = update.callback_query
+    if callback_query is not None:
+        if callback_query.message is not None:
+            return callback_query.message.chat.id
+        return callback_query.from_user.id
+
+    for field in USER_UPDATE_FIELDS:
+        part = getattr(update, field, None)
+        if part is not None:
+            return part.from_user.id
+
+    # Nothing to order by, run it on its own
+    return ("update", update.update_id)
+
+
+class UpdateDispatcher:
+    """Run updates of different chats in parallel, updates of one chat in order"""
+
+    def __init__(
+            self,
+            handler: Callable[[Update], Awaitable[None]],
+            workers: int = settings.BOT_DISPATCHER_WORKERS,
+            max_pending: int = settings.BOT_DISPATCHER_MAX_PENDING
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+
+        # A chat is in _queues while it has work; it is either in _ready or held by one worker
+        self._queues: Dict[Hashable, Deque[Tuple[Update, float]]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._tasks = []
+
+        self.pending = 0
+        self.processed = 0
+        self.failed = 0
+        self.max_wait = 0.0
+        self._total_wait = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start the worker pool"""
+        if self.running:
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Update dispatcher started with {self.workers} workers")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let queued updates finish, then stop the workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Update dispatcher stopped with {self.pending} updates still queued")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Update dispatcher stopped")
+
+    async def submit(self, update: Update) -> None:
+        """Queue an update, waits while max_pending updates are queued"""
+        if not self.running:
+            self.start()
+
+        await self._slots.acquire()
+        self.pending += 1
+        self._idle.clear()
+
+        key = chat_key(update)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((update, time.monotonic()))
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            update, enqueued_at = queue.popleft()
+            self._record_wait(time.monotonic() - enqueued_at)
+
+            try:
+                await self.handler(update)
+            except Exception as e:
+                self.failed += 1
+                logger.exception(f"Error processing update {update.update_id} for chat {key}: {e}")
+            finally:
+                self.processed += 1
+                self.pending -= 1
+                self._slots.release()
+
+                # Back of the line so one busy chat cannot starve the others
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                    if not self.pending:
+                        self._idle.set()
+
+    def _record_wait(self, wait: float) -> None:
+        self._total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+        if wait > settings.BOT_DISPATCHER_SLOW_WAIT_SECONDS:
+            logger.warning(f"Update waited {wait:.2f}s in the dispatcher queue")
+
+    def chat_stats(self, chat_id: Hashable) -> Dict[str, float]:
+        """Queue depth and oldest wait of one chat"""
+        queue = self._queues.get(chat_id)
+        if not queue:
+            return {"depth": 0, "oldest_wait_ms": 0.0}
+        return {
+            "depth": len(queue),
+            "oldest_wait_ms": round((time.monotonic() - queue[0][1]) * 1000, 1)
+        }
+
+    def stats(self, top: int = 5) -> Dict:
+        """Dispatcher counters and the chats that have waited the longest"""
+        waiting = heapq.nsmallest(
+            top,
+            ((queue[0][1], key) for key, queue in self._queues.items() if queue),
+            key=lambda item: item[0]
+        )
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "chats": len(self._queues),
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self._total_wait / self.processed * 1000, 1) if self.processed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "slowest_chats": [
+                {"chat_id": str(key), **self.chat_stats(key)}
+                for _, key in waiting
+            ],
+        }
@@ -1,15 +1,18 @@
 from telebot.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from bot.bot_instance import get_bot
+from bot.state_store import state_store
 from bot.keyboards import (
     get_main_menu_keyboard,
     get_completion_keyboard,
     get_confirmation_keyboard
 )
+from bot.templates import HABIT_LIST
 from services.habit_service import HabitService
 from services.notification_service import NotificationService
 from core.config import settings
+from core.metrics import track_handler
 import logging
-from typing import Optional
+from typing import Optional, Sequence
 
 bot = get_bot()
 logger = logging.getLogger(__name__)
@@ -17,7 +20,6 @@ habit_service = HabitService()
 notification_service = NotificationService()
 
 # User states
-USER_STATES = {}
 STATE_ADDING_HABIT = "adding_habit"
 STATE_EDITING_HABIT = "editing_habit"
 STATE_EDITING_HABIT_TITLE = "editing_habit_title"
@@ -25,33 +27,43 @@ STATE_EDITING_HABIT_DESCRIPTION = "editing_habit_description"
 
 
 def register_handlers():
-    """Register all handlers"""
-    bot.register_message_handler(start_command, commands=['start'], pass_bot=True)
-    bot.register_message_handler(help_command, commands=['help'], pass_bot=True)
-    bot.register_message_handler(cancel_command, commands=['cancel'], pass_bot=True)
-    bot.register_message_handler(main_menu_handler, content_types=['text'], pass_bot=True)
-    bot.register_callback_query_handler(habit_callback_handler, func=lambda call: True, pass_bot=True)
-    bot.register_message_handler(add_habit_handler,
-                                 func=lambda message: get_user_state(message.chat.id) == STATE_ADDING_HABIT,
-                                 pass_bot=True)
-    bot.register_message_handler(edit_habit_title_handler,
-                                 func=lambda message: get_user_state(message.chat.id) == STATE_EDITING_HABIT_TITLE,
-                                 pass_bot=True)
-    bot.register_message_handler(edit_habit_description_handler, func=lambda message: get_user_state(
-        message.chat.id) == STATE_EDITING_HABIT_DESCRIPTION, pass_bot=True)
-
-
-def get_user_state(chat_id: int) -> Optional[str]:
+    """Register all handlers, timed per handler"""
+    bot.register_message_handler(track_handler(start_command), commands=['start'], pass_bot=True)
+    bot.register_message_handler(track_handler(help_command), commands=['help'], pass_bot=True)
+    bot.register_message_handler(track_handler(cancel_command), commands=['cancel'], pass_bot=True)
+    bot.register_message_handler(track_handler(time_command), commands=['time'], pass_bot=True)
+    bot.register_message_handler(track_handler(timezone_command), commands=['timezone'], pass_bot=True)
+    # State handlers go before the menu handler, which accepts any text
+    bot.register_message_handler(track_handler(add_habit_handler), func=in_state(STATE_ADDING_HABIT), pass_bot=True)
+    bot.register_message_handler(track_handler(main_menu_handler), content_types=['text'], pass_bot=True)
+    bot.register_callback_query_handler(track_handler(habit_callback_handler), func=lambda call: True, pass_bot=True)
+
+
+def in_state(state: str):
+    """Message filter for chats in the given state"""
+    async def check(message: Message) -> bool:
+        return await get_user_state(message.chat.id) == state
+    return check
+
+
+async def get_user_state(chat_id: int) -> Optional[str]:
     """Get user state"""
-    return USER_STATES.get(chat_id)
+    return await state_store.get(chat_id)
 
 
-def set_user_state(chat_id: int, state: Optional[str]):
+async def set_user_state(chat_id: int, state: Optional[str]):
     """Set user state"""
     if state is None:
-        USER_STATES.pop(chat_id, None)
+        await state_store.delete(chat_id)
     else:
-        USER_STATES[chat_id] = state
+        await state_store.set(chat_id, state)
+
+
+async def send_chunks(chat_id: int, chunks: Sequence[str], reply_markup=None):
+    """Send a message split into chunks, the keyboard goes with the last one"""
+    for chunk in chunks[:-1]:
+        await bot.send_message(chat_id, chunk)
+    await bot.send_message(chat_id, chunks[-1], reply_markup=reply_markup)
 
 
 async def start_command(message: Message):
@@ -86,13 +98,14 @@ async def help_command(message: Message):
         "Основные команды:\n"
         "/start - Начать работу с ботом\n"
         "/help - Показать это меню помощи\n"
-        "/cancel - Отменить текущее действие\n\n"
+        "/cancel - Отменить текущее действие\n"
+        "/time ЧЧ:ММ - Изменить время напоминаний\n"
+        "/timezone Europe/Moscow - Изменить часовой пояс\n\n"
         "Как работать с привычками:\n"
         "1. Нажмите '➕ Добавить привычку' для создания новой\n"
         "2. Используйте '📋 Мои привычки' для просмотра списка\n"
         "3. '✅ Отметить выполнение' для фиксации прогресса\n"
         "4. Нажмите на привычку для редактирования или удаления\n\n"
-        f"Время напоминаний: {settings.NOTIFICATION_TIME}\n"
         f"Дней для формирования привычки: {settings.HABIT_COMPLETION_DAYS}"
     )
 
@@ -105,7 +118,7 @@ async def help_command(message: Message):
 
 async def cancel_command(message: Message):
     """Handle /cancel"""
-    set_user_state(message.chat.id, None)
+    await set_user_state(message.chat.id, None)
 
     await bot.send_message(
         message.chat.id,
@@ -114,12 +127,44 @@ async def cancel_command(message: Message):
     )
 
 
+async def time_command(message: Message):
+    """Handle /time HH:MM"""
+    args = message.text.split(maxsplit=1)
+
+    try:
+        user = await habit_service.update_user_schedule(
+            telegram_id=str(message.from_user.id),
+            notification_time=args[1].strip() if len(args) > 1 else None
+        )
+        text = f"⏰ Напоминания будут приходить в {user.notification_time} ({user.timezone})."
+    except ValueError:
+        text = "❌ Укажите время в формате ЧЧ:ММ, например: /time 08:30"
+
+    await bot.send_message(message.chat.id, text, reply_markup=get_main_menu_keyboard())
+
+
+async def timezone_command(message: Message):
+    """Handle /timezone Area/City"""
+    args = message.text.split(maxsplit=1)
+
+    try:
+        user = await habit_service.update_user_schedule(
+            telegram_id=str(message.from_user.id),
+            timezone=args[1].strip() if len(args) > 1 else None
+        )
+        text = f"🌍 Часовой пояс: {user.timezone}. Напоминания в {user.notification_time}."
+    except ValueError:
+        text = "❌ Укажите часовой пояс, например: /timezone Europe/Moscow"
+
+    await bot.send_message(message.chat.id, text, reply_markup=get_main_menu_keyboard())
+
+
 async def main_menu_handler(message: Message):
     """Handle main menu buttons"""
     text = message.text.strip()
 
     if text == "➕ Добавить привычку":
-        set_user_state(message.chat.id, STATE_ADDING_HABIT)
+        await set_user_state(message.chat.id, STATE_ADDING_HABIT)
         await bot.send_message(
             message.chat.id,
             "📝 Введите название новой привычки:",
@@ -132,6 +177,9 @@ async def main_menu_handler(message: Message):
     elif text == "✅ Отметить выполнение":
         await show_habits_for_completion(message)
 
+    elif text == "🏆 Рейтинг":
+        await show_leaderboard(message)
+
     elif text == "⚙️ Настройки":
         await show_settings(message)
 
@@ -145,12 +193,12 @@ async def main_menu_handler(message: Message):
 
 async def show_user_habits(message: Message):
     """Show user's habits"""
-    user = await habit_service.get_or_create_user(
+    user_id = await habit_service.get_user_id(
         telegram_id=str(message.from_user.id),
         username=message.from_user.username
     )
 
-    habits = await habit_service.get_user_habits(user.id)
+    habits = await habit_service.get_user_habits(user_id)
 
     if not habits:
         await bot.send_message(
@@ -160,33 +208,17 @@ async def show_user_habits(message: Message):
         )
         return
 
-    response = "📋 Ваши активные привычки:\n\n"
-
-    for i, habit in enumerate(habits, 1):
-        status = "✅" if habit.completion_count > 0 else "🔄"
-        response += (
-            f"{i}. {status} {habit.title}\n"
-            f"   Прогресс: {habit.completion_count}/{settings.HABIT_COMPLETION_DAYS} дней\n"
-        )
-        if habit.description:
-            response += f"   Описание: {habit.description}\n"
-        response += "\n"
-
-    await bot.send_message(
-        message.chat.id,
-        response,
-        reply_markup=get_main_menu_keyboard()
-    )
+    await send_chunks(message.chat.id, HABIT_LIST.render(habits), reply_markup=get_main_menu_keyboard())
 
 
 async def show_habits_for_completion(message: Message):
     """Show habits for marking"""
-    user = await habit_service.get_or_create_user(
+    user_id = await habit_service.get_user_id(
         telegram_id=str(message.from_user.id),
         username=message.from_user.username
     )
 
-    habits = await habit_service.get_user_habits(user.id)
+    habits = await habit_service.get_user_habits(user_id)
 
     if not habits:
         await bot.send_message(
@@ -214,15 +246,54 @@ async def show_habits_for_completion(message: Message):
     )
 
 
+async def show_leaderboard(message: Message):
+    """Show streak leaderboard and user's rank"""
+    user_id = await habit_service.get_user_id(
+        telegram_id=str(message.from_user.id),
+        username=message.from_user.username
+    )
+
+    top, me = await habit_service.get_leaderboard(user_id)
+
+    if not top:
+        await bot.send_message(
+            message.chat.id,
+            "🏆 Рейтинг пока пуст. Он обновляется раз в сутки — отмечайте привычки!",
+            reply_markup=get_main_menu_keyboard()
+        )
+        return
+
+    response = "🏆 Лучшие серии:\n\n"
+    for entry in top:
+        response += f"{entry.rank}. {entry.display_name} — 🔥 {entry.score}\n"
+
+    if me:
+        response += f"\nВаше место: {me.rank} (🔥 {me.score})"
+    else:
+        response += "\nВы пока не в рейтинге."
+
+    await bot.send_message(
+        message.chat.id,
+        response,
+        reply_markup=get_main_menu_keyboard()
+    )
+
+
 async def show_settings(message: Message):
     """Settings menu"""
+    user = await habit_service.get_or_create_user(
+        telegram_id=str(message.from_user.id),
+        username=message.from_user.username
+    )
+
     settings_text = (
         "⚙️ Настройки\n\n"
-        f"⏰ Время напоминаний: {settings.NOTIFICATION_TIME}\n"
+        f"⏰ Время напоминаний: {user.notification_time}\n"
+        f"🌍 Часовой пояс: {user.timezone}\n"
         f"🏆 Дней для формирования привычки: {settings.HABIT_COMPLETION_DAYS}\n"
         f"👤 Ваш Telegram ID: {message.from_user.id}\n"
         f"📝 Активных привычек: {await habit_service.get_active_habits_count(str(message.from_user.id))}\n\n"
-        "Для изменения настроек обратитесь к администратору."
+        "Изменить время: /time ЧЧ:ММ, часовой пояс: /timezone Europe/Moscow"
     )
 
     await bot.send_message(
@@ -244,18 +315,18 @@ async def add_habit_handler(message: Message):
         )
         return
 
-    user = await habit_service.get_or_create_user(
+    user_id = await habit_service.get_user_id(
         telegram_id=str(message.from_user.id),
         username=message.from_user.username
     )
 
     habit = await habit_service.create_habit(
-        user_id=user.id,
+        user_id=user_id,
         title=habit_title,
         description=""
     )
 
-    set_user_state(message.chat.id, None)
+    await set_user_state(message.chat.id, None)
 
     await bot.send_message(
         message.chat.id,
@@ -317,24 +388,27 @@ async def show_completion_options(call: CallbackQuery, habit_id: int):
 async def mark_habit_completed(call: CallbackQuery, habit_id: int, completed: bool):
     """Mark habit"""
     try:
-        user = await habit_service.get_or_create_user(
+        user_id = await habit_service.get_user_id(
             telegram_id=str(call.from_user.id),
             username=call.from_user.username
         )
 
         habit = await habit_service.mark_habit_completed(
             habit_id=habit_id,
-            user_id=user.id,
+            user_id=user_id,
             completed=completed
         )
 
         status_text = "✅" if completed else "❌"
         status_message = "выполнена" if completed else "не выполнена"
+        text = f"{status_text} Привычка '{habit.title}' успешно {status_message}!"
+        if completed:
+            text += f"\n🔥 Серия: {habit.current_streak} дн. (рекорд: {habit.best_streak})"
 
         await bot.edit_message_text(
             chat_id=call.message.chat.id,
             message_id=call.message.message_id,
-            text=f"{status_text} Привычка '{habit.title}' успешно {status_message}!",
+            text=text,
             reply_markup=get_main_menu_keyboard()
         )
 
@@ -361,12 +435,12 @@ async def confirm_deletion(call: CallbackQuery, habit_id: int):
 async def delete_habit_confirmed(call: CallbackQuery, habit_id: int):
     """Delete habit after confirmation"""
     try:
-        user = await habit_service.get_or_create_user(
+        user_id = await habit_service.get_user_id(
             telegram_id=str(call.from_user.id),
             username=call.from_user.username
         )
 
-        await habit_service.delete_habit(habit_id=habit_id, user_id=user.id)
+        await habit_service.delete_habit(habit_id=habit_id, user_id=user_id)
 
         await bot.edit_message_text(
             chat_id=call.message.chat.id,
@@ -397,7 +471,7 @@ async def cancel_deletion(call: CallbackQuery, habit_id: int):
 
 async def start_editing_habit(call: CallbackQuery, habit_id: int):
     """Start editing habit"""
-    set_user_state(call.message.chat.id, STATE_EDITING_HABIT)
+    await set_user_state(call.message.chat.id, STATE_EDITING_HABIT)
 
     keyboard = InlineKeyboardMarkup()
     keyboard.add(
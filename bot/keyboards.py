@@ -1,16 +1,35 @@
-from telebot.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from telebot.types import (
+    ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, JsonSerializable
+)
 
-def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
-    """Get main menu keyboard"""
+
+class SerializedKeyboard(JsonSerializable):
+    """Keyboard serialized to JSON once, sent as is with every message"""
+
+    def __init__(self, keyboard: JsonSerializable):
+        self.json = keyboard.to_json()
+
+    def to_json(self) -> str:
+        return self.json
+
+
+def _build_main_menu_keyboard() -> ReplyKeyboardMarkup:
     keyboard = ReplyKeyboardMarkup(row_width=2, resize_keyboard=True)
     keyboard.add(
         KeyboardButton("➕ Добавить привычку"),
         KeyboardButton("📋 Мои привычки"),
         KeyboardButton("✅ Отметить выполнение"),
+        KeyboardButton("🏆 Рейтинг"),
         KeyboardButton("⚙️ Настройки")
     )
     return keyboard
 
+MAIN_MENU_KEYBOARD = SerializedKeyboard(_build_main_menu_keyboard())
+
+def get_main_menu_keyboard() -> SerializedKeyboard:
+    """Get main menu keyboard"""
+    return MAIN_MENU_KEYBOARD
+
 def get_habit_actions_keyboard(habit_id: int) -> InlineKeyboardMarkup:
     """Get keyboard for habit actions"""
     keyboard = InlineKeyboardMarkup()
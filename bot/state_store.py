@@ -0,0 +1,122 @@
+import logging
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import delete, select, and_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from core.cache import TTLCache
+from core.config import settings
+from db.session import AsyncSessionLocal
+from models.bot_state import BotState
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore(ABC):
+    """Conversation state per chat, entries expire after ttl seconds"""
+
+    def __init__(self, ttl: int = settings.BOT_STATE_TTL_SECONDS):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, chat_id: int) -> Optional[str]:
+        """Get chat state, None when unset or expired"""
+
+    @abstractmethod
+    async def set(self, chat_id: int, state: str) -> None:
+        """Set chat state and restart its ttl"""
+
+    @abstractmethod
+    async def delete(self, chat_id: int) -> None:
+        """Clear chat state"""
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        """Drop expired states, return how many"""
+
+
+class MemoryStateStore(StateStore):
+    """Process-local store, LRU-bounded to max_size chats"""
+
+    def __init__(self, ttl: int = settings.BOT_STATE_TTL_SECONDS, max_size: int = settings.BOT_STATE_MAX_SIZE):
+        super().__init__(ttl)
+        self.cache = TTLCache(max_size, ttl)
+
+    async def get(self, chat_id: int) -> Optional[str]:
+        """Get chat state"""
+        return self.cache.get(chat_id)
+
+    async def set(self, chat_id: int, state: str) -> None:
+        """Set chat state"""
+        self.cache.set(chat_id, state)
+
+    async def delete(self, chat_id: int) -> None:
+        """Clear chat state"""
+        self.cache.invalidate(chat_id)
+
+    async def purge_expired(self) -> int:
+        """Drop expired states"""
+        return self.cache.purge_expired()
+
+
+class PostgresStateStore(StateStore):
+    """Durable store shared by all bot workers"""
+
+    def __init__(self, ttl: int = settings.BOT_STATE_TTL_SECONDS, session_factory=AsyncSessionLocal):
+        super().__init__(ttl)
+        self.session_factory = session_factory
+
+    async def get(self, chat_id: int) -> Optional[str]:
+        """Get chat state"""
+        async with self.session_factory() as db:
+            return await db.scalar(
+                select(BotState.state).where(
+                    and_(
+                        BotState.chat_id == chat_id,
+                        BotState.expires_at > func.now()
+                    )
+                )
+            )
+
+    async def set(self, chat_id: int, state: str) -> None:
+        """Set chat state"""
+        # The database clock decides expiry, so workers on different hosts agree
+        expires_at = func.now() + timedelta(seconds=self.ttl)
+        stmt = pg_insert(BotState).values(chat_id=chat_id, state=state, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BotState.chat_id],
+            set_={"state": stmt.excluded.state, "expires_at": stmt.excluded.expires_at}
+        )
+        async with self.session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def delete(self, chat_id: int) -> None:
+        """Clear chat state"""
+        async with self.session_factory() as db:
+            await db.execute(delete(BotState).where(BotState.chat_id == chat_id))
+            await db.commit()
+
+    async def purge_expired(self) -> int:
+        """Delete expired states"""
+        async with self.session_factory() as db:
+            result = await db.execute(delete(BotState).where(BotState.expires_at <= func.now()))
+            await db.commit()
+            return result.rowcount
+
+
+STATE_STORES = {
+    "memory": MemoryStateStore,
+    "postgres": PostgresStateStore,
+}
+
+
+def create_state_store(backend: str = settings.BOT_STATE_BACKEND) -> StateStore:
+    """Create the store configured by BOT_STATE_BACKEND"""
+    try:
+        return STATE_STORES[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown BOT_STATE_BACKEND: {backend}")
+
+
+state_store = create_state_store()
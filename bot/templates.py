@@ -0,0 +1,133 @@
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Sequence, Tuple
+from core.cache import TTLCache, rendered_cache
+from core.config import settings
+
+# Telegram limit for message text, counted in UTF-16 code units
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def utf16_len(text: str) -> int:
+    """Length as Telegram counts it; characters outside the BMP, like most emoji, take two units"""
+    return len(text) if text.isascii() else len(text.encode("utf-16-le")) // 2
+
+
+def _hard_split(line: str, limit: int) -> List[str]:
+    """Cut a single line at the limit, never between the halves of a surrogate pair"""
+    pieces, start, size = [], 0, 0
+    for i, char in enumerate(line):
+        width = 2 if ord(char) > 0xFFFF else 1
+        if size + width > limit:
+            pieces.append(line[start:i])
+            start, size = i, 0
+        size += width
+    pieces.append(line[start:])
+    return pieces
+
+
+def _pieces(block: str, limit: int) -> Iterable[str]:
+    """The block itself, or its lines when it does not fit into one message"""
+    if utf16_len(block) <= limit:
+        yield block
+        return
+    for line in block.splitlines(keepends=True):
+        if utf16_len(line) <= limit:
+            yield line
+        else:
+            yield from _hard_split(line, limit)
+
+
+def pack(blocks: Iterable[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Join blocks into as few messages as fit the limit, splitting a block only when it alone is too long"""
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        for piece in _pieces(block, limit):
+            length = utf16_len(piece)
+            if current and size + length > limit:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += length
+    if current:
+        chunks.append("".join(current))
+    # Telegram rejects blank messages, trailing newlines are dropped by it anyway
+    return [chunk.rstrip() for chunk in chunks if chunk.strip()]
+
+
+def habit_version(habit) -> Hashable:
+    """Changes whenever a rendered field of the habit does; every UPDATE bumps updated_at"""
+    return habit.id, habit.updated_at
+
+
+class ListTemplate:
+    """Header, one block per item and footer, rendered into message chunks under the Telegram limit"""
+
+    def __init__(
+            self,
+            name: str,
+            header: str,
+            item: Callable[[int, Any], str],
+            footer: str = "",
+            cache: Optional[TTLCache] = None,
+            version: Callable[[Any], Hashable] = habit_version,
+            limit: int = TELEGRAM_MESSAGE_LIMIT
+    ):
+        self.name = name
+        self.header = header
+        self.item = item
+        self.footer = footer
+        self.cache = cache
+        self.version = version
+        self.limit = limit
+
+    def render(self, items: Sequence) -> Tuple[str, ...]:
+        """Message chunks for the items, from the cache when none of them changed"""
+        key = None
+        if self.cache is not None:
+            key = (self.name, tuple(map(self.version, items)))
+            chunks = self.cache.get(key)
+            if chunks is not None:
+                return chunks
+
+        blocks = [self.header]
+        blocks.extend(self.item(i, item) for i, item in enumerate(items, 1))
+        blocks.append(self.footer)
+        chunks = tuple(pack(blocks, self.limit))
+
+        if key is not None:
+            self.cache.set(key, chunks)
+        return chunks
+
+
+def _habit_list_item(i: int, habit) -> str:
+    status = "✅" if habit.completion_count > 0 else "🔄"
+    block = (
+        f"{i}. {status} {habit.title}\n"
+        f"   Прогресс: {habit.completion_count}/{settings.HABIT_COMPLETION_DAYS} дней\n"
+        f"   🔥 Серия: {habit.current_streak} (рекорд: {habit.best_streak})\n"
+    )
+    if habit.description:
+        block += f"   Описание: {habit.description}\n"
+    return block + "\n"
+
+
+def _daily_notification_item(i: int, habit) -> str:
+    block = f"{i}. {habit.title}\n   📊 Прогресс: {habit.completion_count}/{settings.HABIT_COMPLETION_DAYS}\n"
+    if habit.description:
+        block += f"   💡 {habit.description}\n"
+    return block + "\n"
+
+
+HABIT_LIST = ListTemplate(
+    "habit_list",
+    header="📋 Ваши активные привычки:\n\n",
+    item=_habit_list_item,
+    cache=rendered_cache
+)
+
+# Each user gets it once a day, so caching would only push the habit lists out
+DAILY_NOTIFICATION = ListTemplate(
+    "daily_notification",
+    header="🌅 Доброе утро! Время для ваших привычек:\n\n",
+    item=_daily_notification_item,
+    footer="✅ Отметьте выполнение привычек в боте!\n💪 Постоянство - ключ к успеху!"
+)
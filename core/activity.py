@@ -0,0 +1,42 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+# What each task is busy with, e.g. ("bot_handler", "start_command"); read by the loop watchdog
+_task_activity: "WeakKeyDictionary[asyncio.Task, Tuple[str, Union[str, Callable[[], str]]]]" = WeakKeyDictionary()
+
+
+def _running_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+@contextmanager
+def activity(kind: str, name: Union[str, Callable[[], str]]):
+    """Tag the current task; name may be a callable resolved only when a report needs it"""
+    task = _running_task()
+    if task is None:
+        yield
+        return
+
+    previous = _task_activity.get(task)
+    _task_activity[task] = (kind, name)
+    try:
+        yield
+    finally:
+        if previous is None:
+            _task_activity.pop(task, None)
+        else:
+            _task_activity[task] = previous
+
+
+def task_activity(task: Optional[asyncio.Task]) -> Tuple[str, str]:
+    """(kind, name) the task is tagged with, ("unknown", "") when untagged"""
+    tagged = _task_activity.get(task) if task is not None else None
+    if tagged is None:
+        return "unknown", ""
+    kind, name = tagged
+    return kind, name() if callable(name) else name
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -8,24 +9,73 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: str = "5432"
+    SQL_PROFILER_ENABLED: bool = False
+    SQL_SLOW_QUERY_MS: float = 200.0
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
 
     # FastAPI settings
+    PROJECT_NAME: str = "Habit Tracker"
+    API_V1_STR: str = "/api/v1"
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    LOOP_WATCHDOG_ENABLED: bool = False
+    LOOP_STALL_THRESHOLD_SECONDS: float = 0.5
+    LOOP_WATCHDOG_INTERVAL_SECONDS: float = 0.1
 
     # Telegram settings
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_BOT_USERNAME: str
+    TELEGRAM_API_URL: Optional[str] = None
+    TELEGRAM_USE_WEBHOOK: bool = False
+    TELEGRAM_WEBHOOK_URL: Optional[str] = None
+    TELEGRAM_WEBHOOK_PATH: str = "/telegram/webhook"
+    TELEGRAM_WEBHOOK_SECRET: Optional[str] = None
+    TELEGRAM_WEBHOOK_MAX_CONNECTIONS: int = 40
+    BOT_CACHE_MAX_SIZE: int = 50000
+    BOT_USER_CACHE_TTL_SECONDS: int = 3600
+    BOT_HABITS_CACHE_TTL_SECONDS: int = 300
+    BOT_STATE_BACKEND: str = "memory"
+    BOT_STATE_TTL_SECONDS: int = 3600
+    BOT_STATE_MAX_SIZE: int = 100000
+    BOT_DISPATCHER_WORKERS: int = 32
+    BOT_DISPATCHER_MAX_PENDING: int = 10000
+    BOT_DISPATCHER_SLOW_WAIT_SECONDS: float = 5.0
 
     # Notification settings
     NOTIFICATION_TIME: str = "09:00"
+    NOTIFICATION_SPREAD_MINUTES: int = 60
+    NOTIFICATION_TIMEZONE_REFRESH_MINUTES: int = 10
+    DEFAULT_TIMEZONE: str = "UTC"
     HABIT_COMPLETION_DAYS: int = 21
+    HABIT_BATCH_MAX_SIZE: int = 200
+    HABITS_PAGE_SIZE: int = 50
+    HABITS_PAGE_MAX_SIZE: int = 200
+    NOTIFICATION_CONCURRENCY: int = 20
+    NOTIFICATION_MAX_RETRIES: int = 5
+    TELEGRAM_GLOBAL_RATE_LIMIT: float = 30.0
+    TELEGRAM_PER_CHAT_RATE_LIMIT: float = 1.0
+    NOTIFICATION_OUTBOX_WORKER_ENABLED: bool = True
+    NOTIFICATION_OUTBOX_BATCH_SIZE: int = 100
+    NOTIFICATION_OUTBOX_POLL_SECONDS: float = 2.0
+    NOTIFICATION_OUTBOX_LEASE_SECONDS: int = 300
+    NOTIFICATION_OUTBOX_RETENTION_DAYS: int = 7
+    SCHEDULER_LEADER_ELECTION: bool = True
+    SCHEDULER_LEADER_RETRY_SECONDS: float = 10.0
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = 3600
 
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,199 @@
+import functools
+import logging
+import time
+from typing import Callable
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy.engine import Engine
+from telebot.asyncio_helper import ApiTelegramException
+from core.activity import activity
+from db.profiler import profile_scope
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "API request latency per route",
+    ["method", "route", "status"]
+)
+
+BOT_HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds",
+    "Bot handler latency",
+    ["handler", "status"]
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pool connections by state",
+    ["pool", "state"]
+)
+
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Scheduler job run time",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+SCHEDULER_JOB_RUNS = Counter(
+    "scheduler_job_runs_total",
+    "Scheduler job runs by outcome",
+    ["job", "status"]
+)
+
+TELEGRAM_API_DURATION = Histogram(
+    "telegram_api_request_duration_seconds",
+    "Bot API call latency",
+    ["method"]
+)
+
+TELEGRAM_API_ERRORS = Counter(
+    "telegram_api_errors_total",
+    "Failed Bot API calls by error code, 429 is rate limiting",
+    ["method", "code"]
+)
+
+NOTIFICATION_MESSAGES = Counter(
+    "notification_messages_total",
+    "Outbox delivery attempts by result",
+    ["result"]
+)
+
+NOTIFICATION_OUTBOX_IN_PROGRESS = Gauge(
+    "notification_outbox_in_progress_messages",
+    "Claimed outbox rows being sent now"
+)
+
+NOTIFICATION_OUTBOX_QUEUED = Gauge(
+    "notification_outbox_queued_messages",
+    "Claimed outbox rows waiting for a send slot"
+)
+
+NOTIFICATION_OUTBOX_BATCH_DURATION = Histogram(
+    "notification_outbox_batch_duration_seconds",
+    "Time to claim and deliver one outbox batch",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Watchdog heartbeat delay beyond its interval",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Loop stalls over the threshold by what the loop was running",
+    ["kind", "name"]
+)
+
+EVENT_LOOP_STALL_DURATION = Histogram(
+    "event_loop_stall_seconds",
+    "Length of loop stalls",
+    ["kind"],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+
+def render() -> tuple:
+    """Exposition body and content type for /metrics"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def timed_pool(pool_class: type, name: str) -> type:
+    """Pool class that records how long each checkout waits for a connection"""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_CHECKOUT_WAIT.labels(name).observe(time.perf_counter() - started)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """Report pool usage of an engine, read at scrape time"""
+    # engine.pool is replaced on dispose(), so look it up on every scrape
+    states = {
+        "size": lambda: engine.pool.size(),
+        "checked_out": lambda: engine.pool.checkedout(),
+        "idle": lambda: engine.pool.checkedin(),
+        "overflow": lambda: max(engine.pool.overflow(), 0),
+    }
+    for state, read in states.items():
+        DB_POOL_CONNECTIONS.labels(name, state).set_function(read)
+
+
+def track_handler(func: Callable) -> Callable:
+    """Time a bot handler and tag its task for stall reports"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with activity("bot_handler", name):
+                result = await func(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            BOT_HANDLER_DURATION.labels(name, status).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def track_job(job_id: str) -> Callable:
+    """Time a scheduler job, count its outcome and profile its SQL; failures are logged, not raised"""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with activity("scheduler_job", job_id), profile_scope(f"job {job_id}"):
+                    result = await func(*args, **kwargs)
+            except Exception as e:
+                SCHEDULER_JOB_RUNS.labels(job_id, "failure").inc()
+                logger.exception(f"Scheduler job {job_id} failed: {e}")
+                return None
+            else:
+                SCHEDULER_JOB_RUNS.labels(job_id, "success").inc()
+                return result
+            finally:
+                SCHEDULER_JOB_DURATION.labels(job_id).observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def track_telegram_api(process_request: Callable) -> Callable:
+    """Wrap telebot's request function to time every Bot API call"""
+
+    @functools.wraps(process_request)
+    async def wrapper(token, url, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await process_request(token, url, *args, **kwargs)
+        except ApiTelegramException as e:
+            TELEGRAM_API_ERRORS.labels(url, str(e.error_code)).inc()
+            raise
+        except Exception:
+            TELEGRAM_API_ERRORS.labels(url, "network").inc()
+            raise
+        finally:
+            TELEGRAM_API_DURATION.labels(url).observe(time.perf_counter() - started)
+
+    return wrapper
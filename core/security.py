@@ -1,10 +1,18 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
-from app.core.config import settings
+from core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different work factor verify fine and are reported by verify_and_update for rehashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password"""
@@ -14,6 +22,52 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a new hash when the stored one uses an outdated work factor"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def dummy_verify_password() -> None:
+    """Spend the time of one verification, so unknown users are not told apart by timing"""
+    pwd_context.dummy_verify()
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn, not fork: the parent runs the event loop and several threads
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+async def _run_in_hash_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), func, *args)
+
+async def async_get_password_hash(password: str) -> str:
+    """Generate password hash in the password pool"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+async def async_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the password pool"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def async_verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password in the password pool"""
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
+async def async_dummy_verify_password() -> None:
+    """dummy_verify_password in the password pool"""
+    await _run_in_hash_pool(dummy_verify_password)
+
+def shutdown_password_pool() -> None:
+    """Stop the password pool workers"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=True, cancel_futures=True)
+            _hash_pool = None
+
 def create_access_token(
     data: dict, expires_delta: Optional[timedelta] = None
 ) -> str:
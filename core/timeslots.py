@@ -0,0 +1,76 @@
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from core.config import settings
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(value: str) -> int:
+    """Convert HH:MM to minute of day"""
+    hour, minute = value.split(":")
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hour * 60 + minute
+
+
+def format_minute(minute: int) -> str:
+    """Convert minute of day to HH:MM"""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def is_valid_timezone(name: str) -> bool:
+    """Check that name is a known IANA timezone"""
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def default_notification_minute(telegram_id: str) -> int:
+    """Spread users over a window after NOTIFICATION_TIME, stable per user"""
+    base = parse_time(settings.NOTIFICATION_TIME)
+    spread = max(settings.NOTIFICATION_SPREAD_MINUTES, 1)
+    return (base + zlib.crc32(str(telegram_id).encode()) % spread) % MINUTES_PER_DAY
+
+
+def local_minute(now: datetime, timezone: str) -> int:
+    """Minute of day of an aware datetime in the given timezone"""
+    local = now.astimezone(ZoneInfo(timezone))
+    return local.hour * 60 + local.minute
+
+
+def local_today(timezone: str) -> date:
+    """Current date in the given timezone"""
+    return datetime.now(ZoneInfo(timezone)).date()
+
+
+def due_slots(now: datetime, timezones: Iterable[str]) -> List[Tuple[str, int]]:
+    """(timezone, local minute) pairs that are due at the given UTC minute"""
+    return [(tz, local_minute(now, tz)) for tz in timezones]
+
+
+def due_slot_days(minutes: Iterable[datetime], timezones: Iterable[str]) -> Dict[Tuple[str, int], date]:
+    """(timezone, local minute) -> local date, for the slots due at any of the given UTC minutes.
+
+    Local minutes skipped when clocks go forward are due at the first minute after the jump. Minutes
+    repeated when clocks go back are due twice; the outbox queues one message per chat and day.
+    """
+    zones = [(tz, ZoneInfo(tz)) for tz in timezones]
+    days = {}
+    for now in minutes:
+        before = now - timedelta(minutes=1)
+        for tz, zone in zones:
+            local = now.astimezone(zone)
+            days[(tz, local.hour * 60 + local.minute)] = local.date()
+
+            previous = before.astimezone(zone)
+            if local.utcoffset() > previous.utcoffset():
+                wall = previous.replace(tzinfo=None) + timedelta(minutes=1)
+                while wall < local.replace(tzinfo=None):
+                    days[(tz, wall.hour * 60 + wall.minute)] = wall.date()
+                    wall += timedelta(minutes=1)
+    return days
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+from core.activity import activity, task_activity
+from core.config import settings
+from core.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALL_DURATION, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopStall:
+    """One stall: when the last heartbeat ran and what the loop was doing"""
+
+    def __init__(self, last_beat: float, kind: str, name: str, stack: str):
+        self.last_beat = last_beat
+        self.kind = kind
+        self.name = name
+        self.stack = stack
+
+
+class LoopWatchdog:
+    """Heartbeat task on the event loop, checked by a thread that dumps the loop's stack on a stall"""
+
+    def __init__(
+            self,
+            threshold: float = settings.LOOP_STALL_THRESHOLD_SECONDS,
+            interval: float = settings.LOOP_WATCHDOG_INTERVAL_SECONDS,
+            stack_limit: int = 30
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start watching the running loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Loop watchdog started, stall threshold {self.threshold}s")
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the monitor thread"""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._heartbeat_task.cancel()
+        await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+        logger.info("Loop watchdog stopped")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_beat = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(self._last_beat - started - self.interval, 0.0))
+
+    def _monitor(self) -> None:
+        stall: Optional[LoopStall] = None
+        while not self._stopping.wait(self.interval / 2):
+            last_beat = self._last_beat
+
+            if stall is not None and last_beat != stall.last_beat:
+                self._report_end(stall, last_beat)
+                stall = None
+
+            lag = time.monotonic() - last_beat - self.interval
+            if stall is None and lag > self.threshold:
+                stall = self._capture(last_beat)
+                self._report_start(stall, lag)
+
+    def _capture(self, last_beat: float) -> LoopStall:
+        """Stack of the loop thread and the tag of the task it is running"""
+        kind, name = task_activity(asyncio.current_task(self._loop))
+        frame = sys._current_frames().get(self._loop_thread_id)
+        # The blocking call is innermost, so keep the last frames
+        stack = "".join(traceback.format_list(traceback.extract_stack(frame)[-self.stack_limit:])) if frame else ""
+        return LoopStall(last_beat, kind, name, stack)
+
+    def _report_start(self, stall: LoopStall, lag: float) -> None:
+        EVENT_LOOP_STALLS.labels(stall.kind, stall.name).inc()
+        logger.warning(
+            f"Event loop blocked for {lag:.2f}s in {stall.kind} {stall.name}\n{stall.stack}",
+            extra={
+                "event": "loop_stall",
+                "stall_seconds": round(lag, 3),
+                "activity_kind": stall.kind,
+                "activity_name": stall.name,
+                "stack": stall.stack,
+            }
+        )
+
+    def _report_end(self, stall: LoopStall, beat: float) -> None:
+        duration = max(beat - stall.last_beat - self.interval, 0.0)
+        EVENT_LOOP_STALL_DURATION.labels(stall.kind).observe(duration)
+        logger.warning(
+            f"Event loop stall in {stall.kind} {stall.name} ended after {duration:.2f}s",
+            extra={
+                "event": "loop_stall_end",
+                "stall_seconds": round(duration, 3),
+                "activity_kind": stall.kind,
+                "activity_name": stall.name,
+            }
+        )
+
+
+def _route_name(scope: dict) -> str:
+    route = scope.get("route")
+    return route.name if route else "unmatched"
+
+
+class ActivityMiddleware:
+    """Tag the task serving a request with its endpoint, so stalls name the route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The route is matched further down the stack, so the name is resolved at report time
+        with activity("api_route", lambda: _route_name(scope)):
+            await self.app(scope, receive, send)
+
+
+watchdog = LoopWatchdog()
@@ -0,0 +1,50 @@
+import secrets
+from sqlalchemy import and_, insert, select
+from sqlalchemy.orm import Session
+from models.friend_group import FriendGroup, friend_group_members
+from schemas.leaderboard import FriendGroupCreate
+from typing import Optional
+
+
+class CRUDFriendGroup:
+    def get(self, db: Session, group_id: int) -> Optional[FriendGroup]:
+        """Get group by ID"""
+        return db.get(FriendGroup, group_id)
+
+    def get_by_invite_code(self, db: Session, invite_code: str) -> Optional[FriendGroup]:
+        """Get group by invite code"""
+        return db.scalar(select(FriendGroup).where(FriendGroup.invite_code == invite_code))
+
+    def create(self, db: Session, *, obj_in: FriendGroupCreate, owner_id: int) -> FriendGroup:
+        """Create group with its owner as the first member"""
+        db_obj = FriendGroup(
+            name=obj_in.name,
+            invite_code=secrets.token_urlsafe(8),
+            owner_id=owner_id
+        )
+        db.add(db_obj)
+        db.flush()
+        db.execute(insert(friend_group_members).values(group_id=db_obj.id, user_id=owner_id))
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def is_member(self, db: Session, *, group_id: int, user_id: int) -> bool:
+        """Check if user belongs to group"""
+        return db.scalar(
+            select(friend_group_members.c.user_id).where(
+                and_(
+                    friend_group_members.c.group_id == group_id,
+                    friend_group_members.c.user_id == user_id
+                )
+            )
+        ) is not None
+
+    def add_member(self, db: Session, *, group_id: int, user_id: int) -> None:
+        """Add user to group"""
+        if not self.is_member(db, group_id=group_id, user_id=user_id):
+            db.execute(insert(friend_group_members).values(group_id=group_id, user_id=user_id))
+            db.commit()
+
+
+friend_group_crud = CRUDFriendGroup()
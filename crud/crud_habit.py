@@ -1,8 +1,140 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from core.cache import habits_cache
 from models.habit import Habit
+from models.habit_completion import HabitCompletionLog
+from models.user import User
 from schemas.habit import HabitCreate, HabitUpdate
-from typing import List, Optional
-from sqlalchemy import and_
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, case, cast, Date, insert, literal, select, tuple_, update
+
+
+class HabitOwner(NamedTuple):
+    """Owner fields the notification stream needs next to the habits"""
+    telegram_id: str
+    timezone: str
+    notification_minute: Optional[int]
+
+
+def _complete(habit_id: int, owner_id: int, day: Optional[date] = None):
+    """One statement that checks ownership, logs the day and updates counters and streaks.
+
+    Returns the habit row only when the day was newly logged; nothing when the habit is
+    not found, not owned, or already completed that day.
+    """
+    # Default to today in the owner's timezone
+    day_value = literal(day, Date) if day is not None else cast(func.timezone(User.timezone, func.now()), Date)
+    logged = (
+        pg_insert(HabitCompletionLog)
+        .from_select(
+            ["habit_id", "day"],
+            select(Habit.id, day_value)
+            .join(User, User.id == Habit.owner_id)
+            .where(and_(Habit.id == habit_id, Habit.owner_id == owner_id))
+        )
+        .on_conflict_do_nothing(index_elements=["habit_id", "day"])
+        .returning(HabitCompletionLog.habit_id, HabitCompletionLog.day)
+        .cte("logged")
+    )
+
+    # SET expressions see the old row, so the new streak is spelled out for best_streak too
+    backfill = and_(Habit.last_completed_on.is_not(None), logged.c.day <= Habit.last_completed_on)
+    current_streak = case(
+        (backfill, Habit.current_streak),
+        (Habit.last_completed_on == logged.c.day - 1, Habit.current_streak + 1),
+        else_=1
+    )
+    return (
+        update(Habit)
+        .where(Habit.id == logged.c.habit_id)
+        .values(
+            completion_count=func.coalesce(Habit.completion_count, 0) + 1,
+            last_completed=func.now(),
+            current_streak=current_streak,
+            best_streak=func.greatest(Habit.best_streak, current_streak),
+            last_completed_on=case((backfill, Habit.last_completed_on), else_=logged.c.day)
+        )
+        .returning(Habit)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _owned(habit_id: int, owner_id: int):
+    return select(Habit).where(and_(Habit.id == habit_id, Habit.owner_id == owner_id))
+
+
+def _apply_completion(habit: Habit, day: date) -> None:
+    """Update counters and streaks for a newly logged completion day"""
+    habit.completion_count = (habit.completion_count or 0) + 1
+    habit.last_completed = func.now()
+
+    last_day = habit.last_completed_on
+    if last_day is not None and day <= last_day:
+        # Backfilled day, the running streak is not extended
+        return
+
+    if last_day == day - timedelta(days=1):
+        habit.current_streak = (habit.current_streak or 0) + 1
+    else:
+        habit.current_streak = 1
+    habit.best_streak = max(habit.best_streak or 0, habit.current_streak)
+    habit.last_completed_on = day
+
+
+def _reset_stale_streaks():
+    """UPDATE that zeroes streaks whose last completion is before yesterday in the owner's timezone"""
+    owner_yesterday = cast(func.timezone(User.timezone, func.now()), Date) - 1
+    return (
+        update(Habit)
+        .where(
+            and_(
+                Habit.owner_id == User.id,
+                Habit.current_streak > 0,
+                Habit.last_completed_on < owner_yesterday
+            )
+        )
+        .values(current_streak=0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _streaks(days: List[date], today: date) -> Tuple[int, int]:
+    """(current, best) streak from ascending completion days"""
+    best = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous == day - timedelta(days=1) else 1
+        best = max(best, run)
+        previous = day
+
+    # The current streak is alive only if the last completion is today or yesterday
+    current = run if previous is not None and previous >= today - timedelta(days=1) else 0
+    return current, best
+
+
+def _page_query(
+        user_id: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+):
+    """Keyset page on (owner_id, id), one extra row tells whether a next page exists"""
+    conditions = [Habit.owner_id == user_id]
+    if after_id is not None:
+        conditions.append(Habit.id > after_id)
+    if is_active is not None:
+        conditions.append(Habit.is_active == is_active)
+    if created_from is not None:
+        conditions.append(Habit.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(Habit.created_at < created_to)
+
+    return select(Habit).where(and_(*conditions)).order_by(Habit.id).limit(limit + 1)
 
 
 class CRUDHabit:
@@ -23,6 +155,26 @@ class CRUDHabit:
             )
         ).all()
 
+    def get_page(
+            self,
+            db: Session,
+            *,
+            user_id: int,
+            limit: int,
+            after_id: Optional[int] = None,
+            is_active: Optional[bool] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None
+    ) -> Tuple[List[Habit], Optional[int]]:
+        """Get a page of user's habits and the cursor of the next page"""
+        habits = list(db.scalars(
+            _page_query(user_id, limit, after_id, is_active, created_from, created_to)
+        ))
+        if len(habits) > limit:
+            habits = habits[:limit]
+            return habits, habits[-1].id
+        return habits, None
+
     def create(self, db: Session, *, obj_in: HabitCreate, owner_id: int) -> Habit:
         """Create new habit"""
         db_obj = Habit(
@@ -34,13 +186,14 @@ class CRUDHabit:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        habits_cache.invalidate(db_obj.owner_id)
         return db_obj
 
     def update(
             self, db: Session, *, db_obj: Habit, obj_in: HabitUpdate
     ) -> Habit:
         """Update habit"""
-        update_data = obj_in.dict(exclude_unset=True)
+        update_data = obj_in.model_dump(exclude_unset=True)
 
         for field, value in update_data.items():
             setattr(db_obj, field, value)
@@ -48,6 +201,7 @@ class CRUDHabit:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        habits_cache.invalidate(db_obj.owner_id)
         return db_obj
 
     def remove(self, db: Session, *, habit_id: int) -> Habit:
@@ -55,23 +209,101 @@ class CRUDHabit:
         obj = db.query(Habit).get(habit_id)
         db.delete(obj)
         db.commit()
+        habits_cache.invalidate(obj.owner_id)
         return obj
 
-    def mark_completed(self, db: Session, *, habit_id: int, completed: bool) -> Habit:
-        """Mark habit as completed or not completed"""
-        habit = self.get(db, habit_id)
-        if not habit:
-            return None
+    def mark_completed(
+            self, db: Session, *, habit_id: int, owner_id: int, completed: bool, day: Optional[date] = None
+    ) -> Optional[Habit]:
+        """Mark owned habit as completed for a day (once per day), None if not found or not owned"""
+        habit = db.scalar(_complete(habit_id, owner_id, day)) if completed else None
+        if habit is not None:
+            # Keep the RETURNING values loaded instead of expiring them on commit
+            db.expunge(habit)
+            db.commit()
+            habits_cache.invalidate(owner_id)
+            return habit
 
-        if completed:
-            habit.completion_count += 1
-            habit.last_completed = func.now()
-        else:
-            pass
+        # Already completed that day, or nothing to do
+        db.rollback()
+        return db.scalar(_owned(habit_id, owner_id))
 
+    def get_many(self, db: Session, *, habit_ids: Iterable[int], owner_id: int) -> Dict[int, Habit]:
+        """Get owned habits by IDs in one query, locked for update; other users' rows are never locked"""
+        habits = db.scalars(
+            select(Habit)
+            .where(
+                and_(
+                    Habit.id.in_(set(habit_ids)),
+                    Habit.owner_id == owner_id
+                )
+            )
+            .with_for_update()
+        )
+        return {habit.id: habit for habit in habits}
+
+    def create_many(self, db: Session, *, objs_in: List[HabitCreate], owner_id: int) -> List:
+        """Create habits with one multi-row INSERT ... RETURNING and one commit"""
+        rows = db.execute(
+            insert(Habit).returning(*Habit.__table__.columns, sort_by_parameter_order=True),
+            [
+                {
+                    "title": obj_in.title,
+                    "description": obj_in.description,
+                    "is_active": obj_in.is_active,
+                    "owner_id": owner_id,
+                }
+                for obj_in in objs_in
+            ]
+        ).all()
         db.commit()
-        db.refresh(habit)
-        return habit
+        habits_cache.invalidate(owner_id)
+        return rows
+
+    def complete_many(
+            self, db: Session, *, habits: Dict[int, Habit], completions: List[Tuple[int, date]], today: date
+    ) -> List[Habit]:
+        """Log completion days for owned habits and commit once"""
+        pairs = sorted(set(completions), key=lambda pair: pair[1])
+        inserted = db.execute(
+            pg_insert(HabitCompletionLog)
+            .on_conflict_do_nothing(index_elements=["habit_id", "day"])
+            .returning(HabitCompletionLog.habit_id, HabitCompletionLog.day),
+            [{"habit_id": habit_id, "day": day} for habit_id, day in pairs]
+        ).all()
+
+        # Days already logged are skipped; a day before the last completion can bridge a gap
+        backfilled = set()
+        for habit_id, day in sorted(inserted, key=lambda row: row.day):
+            habit = habits[habit_id]
+            if habit.last_completed_on is not None and day <= habit.last_completed_on:
+                backfilled.add(habit_id)
+            _apply_completion(habit, day)
+
+        if backfilled:
+            days: Dict[int, List[date]] = {}
+            for habit_id, day in db.execute(
+                select(HabitCompletionLog.habit_id, HabitCompletionLog.day)
+                .where(HabitCompletionLog.habit_id.in_(backfilled))
+                .order_by(HabitCompletionLog.habit_id, HabitCompletionLog.day)
+            ):
+                days.setdefault(habit_id, []).append(day)
+            for habit_id, habit_days in days.items():
+                habit = habits[habit_id]
+                habit.current_streak, habit.best_streak = _streaks(habit_days, today)
+                habit.last_completed_on = habit_days[-1]
+
+        db.commit()
+        for owner_id in {habit.owner_id for habit in habits.values()}:
+            habits_cache.invalidate(owner_id)
+
+        # One query instead of a refresh per expired habit
+        return list(db.scalars(
+            select(Habit)
+            .where(Habit.id.in_(list(habits)))
+            .order_by(Habit.id)
+            .execution_options(populate_existing=True)
+        ))
 
     def get_habits_to_continue(self, db: Session, user_id: int, completion_days: int = 21) -> List[Habit]:
         """Get habits that need to continue"""
@@ -84,4 +316,152 @@ class CRUDHabit:
         ).all()
 
 
-habit_crud = CRUDHabit()
\ No newline at end of file
+class AsyncCRUDHabit:
+    async def get(self, db: AsyncSession, habit_id: int) -> Optional[Habit]:
+        """Get habit by ID"""
+        return await db.get(Habit, habit_id)
+
+    async def get_by_user(self, db: AsyncSession, user_id: int) -> List[Habit]:
+        """Get habits by user ID"""
+        result = await db.scalars(select(Habit).where(Habit.owner_id == user_id))
+        return list(result)
+
+    async def get_active_by_user(self, db: AsyncSession, user_id: int) -> List[Habit]:
+        """Get active habits by user ID"""
+        result = await db.scalars(
+            select(Habit).where(
+                and_(
+                    Habit.owner_id == user_id,
+                    Habit.is_active == True
+                )
+            )
+        )
+        return list(result)
+
+    async def count_active_by_user(self, db: AsyncSession, user_id: int) -> int:
+        """Count active habits by user ID"""
+        return await db.scalar(
+            select(func.count(Habit.id)).where(
+                and_(
+                    Habit.owner_id == user_id,
+                    Habit.is_active == True
+                )
+            )
+        )
+
+    async def create(self, db: AsyncSession, *, obj_in: HabitCreate, owner_id: int) -> Habit:
+        """Create new habit"""
+        db_obj = Habit(
+            title=obj_in.title,
+            description=obj_in.description,
+            is_active=obj_in.is_active,
+            owner_id=owner_id
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        habits_cache.invalidate(db_obj.owner_id)
+        return db_obj
+
+    async def update(
+            self, db: AsyncSession, *, db_obj: Habit, obj_in: HabitUpdate
+    ) -> Habit:
+        """Update habit"""
+        update_data = obj_in.model_dump(exclude_unset=True)
+
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        habits_cache.invalidate(db_obj.owner_id)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, habit_id: int) -> Optional[Habit]:
+        """Remove habit"""
+        obj = await db.get(Habit, habit_id)
+        if obj:
+            await db.delete(obj)
+            await db.commit()
+            habits_cache.invalidate(obj.owner_id)
+        return obj
+
+    async def mark_completed(
+            self, db: AsyncSession, *, habit_id: int, owner_id: int, completed: bool, day: Optional[date] = None
+    ) -> Optional[Habit]:
+        """Mark owned habit as completed for a day (once per day), None if not found or not owned"""
+        habit = await db.scalar(_complete(habit_id, owner_id, day)) if completed else None
+        if habit is not None:
+            await db.commit()
+            habits_cache.invalidate(owner_id)
+            return habit
+
+        # Already completed that day, or nothing to do
+        await db.rollback()
+        return await db.scalar(_owned(habit_id, owner_id))
+
+    async def reset_stale_streaks(self, db: AsyncSession) -> int:
+        """Zero streaks that were not continued yesterday"""
+        result = await db.execute(_reset_stale_streaks())
+        await db.commit()
+        if result.rowcount:
+            habits_cache.clear()
+        return result.rowcount
+
+    async def get_habits_to_continue(self, db: AsyncSession, user_id: int, completion_days: int = 21) -> List[Habit]:
+        """Get habits that need to continue"""
+        result = await db.scalars(
+            select(Habit).where(
+                and_(
+                    Habit.owner_id == user_id,
+                    Habit.is_active == True,
+                    Habit.completion_count < completion_days
+                )
+            )
+        )
+        return list(result)
+
+    async def stream_active_by_owner(
+            self,
+            db: AsyncSession,
+            slots: Optional[List[Tuple[str, int]]] = None,
+            batch_size: int = 1000
+    ) -> AsyncIterator[Tuple[HabitOwner, List[Habit]]]:
+        """Stream active habits of active users grouped by owner"""
+        query = (
+            select(User.telegram_id, User.timezone, User.notification_minute, Habit)
+            .join(Habit.owner)
+            .where(
+                and_(
+                    User.is_active == True,
+                    Habit.is_active == True
+                )
+            )
+        )
+        if slots is not None:
+            query = query.where(
+                tuple_(User.timezone, User.notification_minute).in_(slots)
+            )
+
+        result = await db.stream(
+            query
+            .order_by(Habit.owner_id, Habit.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        owner, habits = None, []
+        async for telegram_id, timezone, notification_minute, habit in result:
+            if habits and telegram_id != owner.telegram_id:
+                yield owner, habits
+                habits = []
+            if not habits:
+                owner = HabitOwner(telegram_id, timezone, notification_minute)
+            habits.append(habit)
+
+        if habits:
+            yield owner, habits
+
+
+habit_crud = CRUDHabit()
+async_habit_crud = AsyncCRUDHabit()
\ No newline at end of file
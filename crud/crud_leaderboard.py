@@ -0,0 +1,147 @@
+from sqlalchemy import Row, and_, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.friend_group import friend_group_members
+from models.habit import Habit
+from models.leaderboard import LeaderboardEntry
+from models.user import User
+from schemas.leaderboard import LeaderboardMetric
+from typing import List, Optional
+
+SCORES = {
+    LeaderboardMetric.streak: func.max(Habit.current_streak),
+    LeaderboardMetric.completions: func.sum(Habit.completion_count),
+}
+
+
+def _top_query(metric: LeaderboardMetric, limit: int):
+    return (
+        select(LeaderboardEntry)
+        .where(
+            and_(
+                LeaderboardEntry.metric == metric.value,
+                LeaderboardEntry.position <= limit
+            )
+        )
+        .order_by(LeaderboardEntry.position)
+    )
+
+
+def _user_query(metric: LeaderboardMetric, user_id: int):
+    return select(LeaderboardEntry).where(
+        and_(
+            LeaderboardEntry.metric == metric.value,
+            LeaderboardEntry.user_id == user_id
+        )
+    )
+
+
+def _group_ranked(metric: LeaderboardMetric, group_id: int):
+    """Group members' entries, positioned and ranked among the members only"""
+    return (
+        select(
+            LeaderboardEntry.user_id,
+            LeaderboardEntry.display_name,
+            LeaderboardEntry.score,
+            LeaderboardEntry.computed_at,
+            func.row_number().over(order_by=LeaderboardEntry.position).label("position"),
+            func.rank().over(order_by=LeaderboardEntry.score.desc()).label("rank")
+        )
+        .join(friend_group_members, friend_group_members.c.user_id == LeaderboardEntry.user_id)
+        .where(
+            and_(
+                friend_group_members.c.group_id == group_id,
+                LeaderboardEntry.metric == metric.value
+            )
+        )
+        .subquery()
+    )
+
+
+def _group_top_query(metric: LeaderboardMetric, group_id: int, limit: int):
+    ranked = _group_ranked(metric, group_id)
+    return select(ranked).where(ranked.c.position <= limit).order_by(ranked.c.position)
+
+
+def _group_user_query(metric: LeaderboardMetric, group_id: int, user_id: int):
+    ranked = _group_ranked(metric, group_id)
+    return select(ranked).where(ranked.c.user_id == user_id)
+
+
+def _rebuild_insert(metric: LeaderboardMetric):
+    """INSERT ... SELECT that ranks every active user with a positive score"""
+    scores = (
+        select(
+            Habit.owner_id.label("user_id"),
+            func.coalesce(User.username, User.telegram_id).label("display_name"),
+            SCORES[metric].label("score")
+        )
+        .join(User, User.id == Habit.owner_id)
+        .where(
+            and_(
+                User.is_active == True,
+                Habit.is_active == True
+            )
+        )
+        .group_by(Habit.owner_id, User.username, User.telegram_id)
+        .subquery()
+    )
+
+    ranked = select(
+        literal(metric.value),
+        func.row_number().over(order_by=(scores.c.score.desc(), scores.c.user_id)),
+        func.rank().over(order_by=scores.c.score.desc()),
+        scores.c.score,
+        scores.c.user_id,
+        scores.c.display_name
+    ).where(scores.c.score > 0)
+
+    return insert(LeaderboardEntry).from_select(
+        ["metric", "position", "rank", "score", "user_id", "display_name"],
+        ranked
+    )
+
+
+class CRUDLeaderboard:
+    def get_top(self, db: Session, metric: LeaderboardMetric, limit: int = 50) -> List[LeaderboardEntry]:
+        """Get top entries for a metric"""
+        return list(db.scalars(_top_query(metric, limit)))
+
+    def get_for_user(self, db: Session, metric: LeaderboardMetric, user_id: int) -> Optional[LeaderboardEntry]:
+        """Get user's entry for a metric"""
+        return db.scalar(_user_query(metric, user_id))
+
+    def get_group_top(
+            self, db: Session, metric: LeaderboardMetric, group_id: int, limit: int = 50
+    ) -> List[Row]:
+        """Get top entries of group members, ranked within the group"""
+        return list(db.execute(_group_top_query(metric, group_id, limit)))
+
+    def get_group_for_user(
+            self, db: Session, metric: LeaderboardMetric, group_id: int, user_id: int
+    ) -> Optional[Row]:
+        """Get user's entry ranked within the group"""
+        return db.execute(_group_user_query(metric, group_id, user_id)).first()
+
+
+class AsyncCRUDLeaderboard:
+    async def get_top(self, db: AsyncSession, metric: LeaderboardMetric, limit: int = 50) -> List[LeaderboardEntry]:
+        """Get top entries for a metric"""
+        return list(await db.scalars(_top_query(metric, limit)))
+
+    async def get_for_user(
+            self, db: AsyncSession, metric: LeaderboardMetric, user_id: int
+    ) -> Optional[LeaderboardEntry]:
+        """Get user's entry for a metric"""
+        return await db.scalar(_user_query(metric, user_id))
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Replace all leaderboard snapshots in one transaction"""
+        for metric in LeaderboardMetric:
+            await db.execute(delete(LeaderboardEntry).where(LeaderboardEntry.metric == metric.value))
+            await db.execute(_rebuild_insert(metric))
+        await db.commit()
+
+
+leaderboard_crud = CRUDLeaderboard()
+async_leaderboard_crud = AsyncCRUDLeaderboard()
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.notification_outbox import NotificationOutbox
+from typing import AsyncIterable, List, Optional
+
+CLAIMABLE_STATUSES = ("pending", "sending")
+
+
+class AsyncCRUDOutbox:
+    async def enqueue(self, db: AsyncSession, rows: AsyncIterable[dict], batch_size: int = 1000) -> int:
+        """Insert messages in batches, skipping ones already queued for the same chat, kind and day"""
+        queued, batch = 0, []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                queued += await self._insert(db, batch)
+                batch = []
+        if batch:
+            queued += await self._insert(db, batch)
+        return queued
+
+    async def _insert(self, db: AsyncSession, batch: List[dict]) -> int:
+        result = await db.scalars(
+            pg_insert(NotificationOutbox)
+            .values(batch)
+            .on_conflict_do_nothing(constraint="uq_notification_outbox_chat_id_kind_day")
+            .returning(NotificationOutbox.id)
+        )
+        inserted = len(result.all())
+        await db.commit()
+        return inserted
+
+    async def claim(self, db: AsyncSession, *, limit: int, lease_seconds: int) -> List[NotificationOutbox]:
+        """Lease due rows to this worker; rows locked by other workers are skipped, not waited for"""
+        due = (
+            select(NotificationOutbox.id)
+            .where(
+                and_(
+                    NotificationOutbox.status.in_(CLAIMABLE_STATUSES),
+                    NotificationOutbox.next_attempt_at <= func.now()
+                )
+            )
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        # attempts doubles as the lease token: a later claim of the same row bumps it
+        result = await db.scalars(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due))
+            .values(
+                status="sending",
+                attempts=NotificationOutbox.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds)
+            )
+            .returning(NotificationOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        rows = list(result)
+        await db.commit()
+        return rows
+
+    async def finish(
+            self,
+            db: AsyncSession,
+            row: NotificationOutbox,
+            *,
+            status: str,
+            chunks_sent: int,
+            retry_in: Optional[float] = None,
+            error: Optional[str] = None,
+            failed: bool = False
+    ) -> bool:
+        """Record the outcome of a claimed row; False when the lease was lost to another worker"""
+        values = {"status": status, "chunks_sent": chunks_sent, "last_error": error}
+        if failed:
+            values["failures"] = NotificationOutbox.failures + 1
+        if status == "sent":
+            values["sent_at"] = func.now()
+        if retry_in is not None:
+            values["next_attempt_at"] = func.now() + timedelta(seconds=retry_in)
+
+        result = await db.execute(
+            update(NotificationOutbox)
+            .where(
+                and_(
+                    NotificationOutbox.id == row.id,
+                    NotificationOutbox.attempts == row.attempts,
+                    NotificationOutbox.status == "sending"
+                )
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    async def purge(self, db: AsyncSession, *, before: datetime) -> int:
+        """Delete delivered and failed rows created before the given time"""
+        result = await db.execute(
+            delete(NotificationOutbox).where(
+                and_(
+                    NotificationOutbox.status.in_(("sent", "failed")),
+                    NotificationOutbox.created_at < before
+                )
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+
+async_outbox_crud = AsyncCRUDOutbox()
@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.scheduler_checkpoint import SchedulerCheckpoint
+from typing import Optional
+
+
+class AsyncCRUDSchedulerCheckpoint:
+    async def get(self, db: AsyncSession, *, name: str) -> Optional[datetime]:
+        """Last time the named job recorded as handled"""
+        return await db.scalar(
+            select(SchedulerCheckpoint.last_run_at).where(SchedulerCheckpoint.name == name)
+        )
+
+    async def advance(self, db: AsyncSession, *, name: str, to: datetime) -> Optional[datetime]:
+        """Move the checkpoint forward to `to` and return where it was; concurrent callers queue on the row lock"""
+        await db.execute(
+            pg_insert(SchedulerCheckpoint)
+            .values(name=name, last_run_at=None)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        previous = await db.scalar(
+            select(SchedulerCheckpoint.last_run_at)
+            .where(SchedulerCheckpoint.name == name)
+            .with_for_update()
+        )
+        if previous is None or previous < to:
+            await db.execute(
+                update(SchedulerCheckpoint)
+                .where(SchedulerCheckpoint.name == name)
+                .values(last_run_at=to)
+            )
+        await db.commit()
+        return previous
+
+
+async_checkpoint_crud = AsyncCRUDSchedulerCheckpoint()
@@ -1,8 +1,14 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.user import User
 from schemas.user import UserCreate, UserUpdate
-from core.security import get_password_hash, verify_password
-from typing import Optional
+from core.cache import timezones_cache, user_cache
+from core.security import async_get_password_hash, get_password_hash
+from core.timeslots import parse_time
+from typing import List, Optional
+
+ACTIVE_TIMEZONES = "active"
 
 
 class CRUDUser:
@@ -14,8 +20,8 @@ class CRUDUser:
         """Get user by email"""
         return db.query(User).filter(User.email == email).first()
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        """Create new user"""
+    def create(self, db: Session, *, obj_in: UserCreate, hashed_password: Optional[str] = None) -> User:
+        """Create new user; API callers pass a hash made in the password pool"""
         db_obj = User(
             telegram_id=obj_in.telegram_id,
             username=obj_in.username,
@@ -24,28 +30,56 @@ class CRUDUser:
         )
 
         if obj_in.password:
-            db_obj.hashed_password = get_password_hash(obj_in.password)
+            db_obj.hashed_password = hashed_password or get_password_hash(obj_in.password)
 
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
-    def update(self, db: Session, *, db_obj: User, obj_in: UserUpdate) -> User:
-        """Update user"""
-        update_data = obj_in.dict(exclude_unset=True)
+    def update(
+            self, db: Session, *, db_obj: User, obj_in: UserUpdate, hashed_password: Optional[str] = None
+    ) -> User:
+        """Update user; API callers pass a hash made in the password pool"""
+        update_data = obj_in.model_dump(exclude_unset=True)
 
-        if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
-            update_data["hashed_password"] = hashed_password
-            del update_data["password"]
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = hashed_password or get_password_hash(password)
 
+        # notification_time is a read-only view of notification_minute, never set it directly
+        notification_time = update_data.pop("notification_time", None)
+        if notification_time is not None:
+            update_data["notification_minute"] = parse_time(notification_time)
+
+        timezone_changed = "timezone" in update_data and update_data["timezone"] != db_obj.timezone
         for field, value in update_data.items():
             setattr(db_obj, field, value)
 
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        user_cache.invalidate(db_obj.telegram_id)
+        if timezone_changed:
+            # The new timezone's slots must be due right away, not after the next refresh
+            timezones_cache.invalidate(ACTIVE_TIMEZONES)
+        return db_obj
+
+    def update_password_hash(self, db: Session, *, db_obj: User, hashed_password: str) -> User:
+        """Replace the stored hash, e.g. after a work factor change"""
+        db_obj.hashed_password = hashed_password
+        db.add(db_obj)
+        db.commit()
+        user_cache.invalidate(db_obj.telegram_id)
+        return db_obj
+
+    def deactivate(self, db: Session, *, db_obj: User) -> User:
+        """Deactivate user"""
+        db_obj.is_active = False
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        user_cache.invalidate(db_obj.telegram_id)
         return db_obj
 
     def authenticate(self, db: Session, telegram_id: str) -> Optional[User]:
@@ -60,4 +94,82 @@ class CRUDUser:
         return user.is_active
 
 
-user_crud = CRUDUser()
\ No newline at end of file
+class AsyncCRUDUser:
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Get user by ID"""
+        return await db.get(User, user_id)
+
+    async def get_by_telegram_id(self, db: AsyncSession, telegram_id: str) -> Optional[User]:
+        """Get user by telegram ID"""
+        return await db.scalar(select(User).where(User.telegram_id == telegram_id))
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        """Get user by email"""
+        return await db.scalar(select(User).where(User.email == email))
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        """Create new user"""
+        db_obj = User(
+            telegram_id=obj_in.telegram_id,
+            username=obj_in.username,
+            email=obj_in.email,
+            is_active=True
+        )
+
+        if obj_in.password:
+            db_obj.hashed_password = await async_get_password_hash(obj_in.password)
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(self, db: AsyncSession, *, db_obj: User, obj_in: UserUpdate) -> User:
+        """Update user"""
+        update_data = obj_in.model_dump(exclude_unset=True)
+
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = await async_get_password_hash(password)
+
+        # notification_time is a read-only view of notification_minute, never set it directly
+        notification_time = update_data.pop("notification_time", None)
+        if notification_time is not None:
+            update_data["notification_minute"] = parse_time(notification_time)
+
+        timezone_changed = "timezone" in update_data and update_data["timezone"] != db_obj.timezone
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        user_cache.invalidate(db_obj.telegram_id)
+        if timezone_changed:
+            # The new timezone's slots must be due right away, not after the next refresh
+            timezones_cache.invalidate(ACTIVE_TIMEZONES)
+        return db_obj
+
+    async def deactivate(self, db: AsyncSession, *, db_obj: User) -> User:
+        """Deactivate user"""
+        db_obj.is_active = False
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        user_cache.invalidate(db_obj.telegram_id)
+        return db_obj
+
+    async def get_timezones(self, db: AsyncSession) -> List[str]:
+        """Get distinct timezones of active users, cached for NOTIFICATION_TIMEZONE_REFRESH_MINUTES"""
+        timezones = timezones_cache.get(ACTIVE_TIMEZONES)
+        if timezones is None:
+            result = await db.scalars(
+                select(User.timezone).where(User.is_active == True).distinct()
+            )
+            timezones = list(result)
+            timezones_cache.set(ACTIVE_TIMEZONES, timezones)
+        return timezones
+
+
+user_crud = CRUDUser()
+async_user_crud = AsyncCRUDUser()
\ No newline at end of file
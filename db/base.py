@@ -1,6 +1,23 @@
 from models.base import Base
 from models.user import User
 from models.habit import Habit
+from models.habit_completion import HabitCompletionLog
+from models.leaderboard import LeaderboardEntry
+from models.friend_group import FriendGroup, friend_group_members
+from models.bot_state import BotState
+from models.scheduler_checkpoint import SchedulerCheckpoint
+from models.notification_outbox import NotificationOutbox
 
 # Import all models for Alembic
-__all__ = ["Base", "User", "Habit"]
\ No newline at end of file
+__all__ = [
+    "Base",
+    "User",
+    "Habit",
+    "HabitCompletionLog",
+    "LeaderboardEntry",
+    "FriendGroup",
+    "friend_group_members",
+    "BotState",
+    "SchedulerCheckpoint",
+    "NotificationOutbox",
+]
\ No newline at end of file
@@ -0,0 +1,34 @@
+import logging
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def get_head_revision() -> str:
+    """Latest revision in alembic/versions"""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def get_current_revision(engine: Engine) -> str:
+    """Revision the database is stamped with"""
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def check_schema_version(engine: Engine) -> None:
+    """Fail startup unless the database is migrated to head"""
+    head = get_head_revision()
+    current = get_current_revision(engine)
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. Run `alembic upgrade head`."
+        )
+    logger.info(f"Database schema is at revision {current}")
@@ -0,0 +1,164 @@
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = str(Path(__file__).resolve().parents[1])
+
+_current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("sql_query_profile", default=None)
+
+
+class QueryProfile:
+    """Statements run inside one scope; nested scopes also count towards their parents"""
+
+    def __init__(self, name: str, parent: Optional["QueryProfile"] = None):
+        self.name = name
+        self.parent = parent
+        self.count = 0
+        self.total = 0.0
+        self.shapes: Dict[str, int] = {}
+        self.call_sites: Dict[str, str] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        profile, call_site = self, None
+        while profile is not None:
+            profile.count += 1
+            profile.total += elapsed
+            seen = profile.shapes.get(statement, 0)
+            profile.shapes[statement] = seen + 1
+            if not seen:
+                # Walking the stack is the expensive part, once per new shape
+                call_site = call_site or _call_site()
+                profile.call_sites[statement] = call_site
+            profile = profile.parent
+
+    def repeated(self, threshold: int = settings.SQL_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int, str]]:
+        """(statement, times, first call site) for shapes run at least threshold times"""
+        return [
+            (statement, times, self.call_sites[statement])
+            for statement, times in self.shapes.items()
+            if times >= threshold
+        ]
+
+    def report(self) -> None:
+        """Log the summary and likely N+1 shapes"""
+        if not self.count:
+            return
+        logger.info(f"SQL {self.name}: {self.count} statements in {self.total * 1000:.1f} ms")
+        for statement, times, call_site in self.repeated():
+            logger.warning(
+                f"Possible N+1 in {self.name}: {times} x {_shorten(statement)} first issued at {call_site}"
+            )
+
+
+def _shorten(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def _project_frames(frame, depth: int = 3) -> List[str]:
+    """Innermost application frames, skipping libraries and this module"""
+    sites = []
+    while frame is not None and len(sites) < depth:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename and filename != __file__:
+            sites.append(f"{Path(filename).relative_to(PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return sites
+
+
+def _call_site() -> str:
+    """Application lines that issued the statement, innermost first"""
+    sites = _project_frames(sys._getframe(1))
+    if not sites:
+        # Async sessions run the cursor in a child greenlet, the awaiting code is in the parent
+        parent = getcurrent().parent
+        if parent is not None:
+            sites = _project_frames(parent.gr_frame)
+    return " <- ".join(sites) or "unknown"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["profiler_started"].pop()
+
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(f"Slow query {elapsed * 1000:.1f} ms at {_call_site()}: {_shorten(statement)}")
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("profiler_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+LISTENERS = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+    ("handle_error", _handle_error),
+)
+
+
+def install(engine: Engine) -> None:
+    """Profile statements of a sync engine; pass async_engine.sync_engine for async ones"""
+    for name, listener in LISTENERS:
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
+
+
+def uninstall(engine: Engine) -> None:
+    """Remove the profiler from an engine"""
+    for name, listener in LISTENERS:
+        if event.contains(engine, name, listener):
+            event.remove(engine, name, listener)
+
+
+@contextmanager
+def profile_scope(name: str, report: bool = True):
+    """Collect statements of the block; without installed engines it only costs a contextvar"""
+    profile = QueryProfile(name, parent=_current_profile.get())
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+        if report:
+            profile.report()
+
+
+@contextmanager
+def assert_max_queries(limit: int, max_repeats: Optional[int] = None, name: str = "query budget"):
+    """Fail when the block runs more than limit statements, or one shape more than max_repeats times"""
+    with profile_scope(name, report=False) as profile:
+        yield profile
+
+    if profile.count > limit:
+        statements = "\n".join(
+            f"  {times} x {_shorten(statement)} ({profile.call_sites[statement]})"
+            for statement, times in profile.shapes.items()
+        )
+        raise AssertionError(f"{name}: {profile.count} statements, budget is {limit}\n{statements}")
+
+    if max_repeats is not None:
+        repeated = profile.repeated(max_repeats + 1)
+        if repeated:
+            statement, times, call_site = repeated[0]
+            raise AssertionError(
+                f"{name}: {times} x {_shorten(statement)} at {call_site}, at most {max_repeats} allowed"
+            )
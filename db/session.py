@@ -1,9 +1,14 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from core.config import settings
+from core.metrics import instrument_pool, timed_pool
+from db import profiler
 
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=timed_pool(QueuePool, "sync"),
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
@@ -13,6 +18,30 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the bot and scheduler, which share one event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=timed_pool(AsyncAdaptedQueuePool, "async"),
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=30,
+    pool_recycle=1800
+)
+
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
+
+if settings.SQL_PROFILER_ENABLED:
+    profiler.install(engine)
+    profiler.install(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -21,4 +50,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
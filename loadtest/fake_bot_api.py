@@ -0,0 +1,276 @@
+"""Local stand-in for the Telegram Bot API.
+
+Point the bot at it with TELEGRAM_API_URL=http://localhost:8081 and run:
+
+    python -m loadtest.fake_bot_api --port 8081 --latency-ms 50 --error-rate 0.01
+
+Bot methods live under /bot<token>/<method>. The replayer feeds updates and reads the
+bot's replies through the /control endpoints.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Methods whose reply the replayer waits for
+REPLY_METHODS = {"sendMessage", "editMessageText"}
+
+
+class FakeAPIConfig(BaseModel):
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    retry_after: int = 1
+    per_chat_rate: float = 0.0
+    global_rate: float = 0.0
+
+
+class FakeBotAPI:
+    """In-memory Bot API state: the update queue, sent messages and counters"""
+
+    def __init__(self, config: Optional[FakeAPIConfig] = None):
+        self.config = config or FakeAPIConfig()
+        self.reset()
+
+    def reset(self) -> None:
+        self.updates: Deque[dict] = deque()
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.new_updates = asyncio.Event()
+
+        # Every reply per chat, in the order the bot sent it
+        self.replies: Dict[int, List[dict]] = defaultdict(list)
+        self.reply_events: Dict[int, asyncio.Event] = defaultdict(asyncio.Event)
+
+        self.chat_sends: Dict[int, Deque[float]] = defaultdict(deque)
+        self.global_sends: Deque[float] = deque()
+
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.injected_429 = 0
+        self.rate_limited_429 = 0
+        self.started_at = time.monotonic()
+
+    def push_updates(self, updates: List[dict]) -> List[int]:
+        """Queue updates for getUpdates, assigning update ids"""
+        ids = []
+        for update in updates:
+            update["update_id"] = self.next_update_id
+            self.next_update_id += 1
+            self.updates.append(update)
+            ids.append(update["update_id"])
+        self.new_updates.set()
+        return ids
+
+    async def get_updates(self, offset: int, limit: int, timeout: float) -> List[dict]:
+        """Long poll like Telegram: confirm updates below offset, wait up to timeout"""
+        while self.updates and self.updates[0]["update_id"] < offset:
+            self.updates.popleft()
+
+        if not self.updates and timeout > 0:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return [update for _, update in zip(range(limit), self.updates)]
+
+    def rate_limited(self, chat_id: Optional[int]) -> bool:
+        """Check the per-chat and global one-second windows, counting the send if allowed"""
+        now = time.monotonic()
+        windows = []
+        if self.config.global_rate:
+            windows.append((self.global_sends, self.config.global_rate))
+        if self.config.per_chat_rate and chat_id is not None:
+            windows.append((self.chat_sends[chat_id], self.config.per_chat_rate))
+
+        for sends, rate in windows:
+            while sends and now - sends[0] >= 1.0:
+                sends.popleft()
+            if len(sends) >= rate:
+                return True
+
+        for sends, _ in windows:
+            sends.append(now)
+        return False
+
+    def record_reply(self, method: str, params: dict) -> dict:
+        """Store an outgoing message and wake the replayer waiting on its chat"""
+        chat_id = int(params["chat_id"])
+        message_id = int(params.get("message_id") or 0)
+        if not message_id:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params.get("text", ""),
+        }
+        reply_markup = json.loads(params["reply_markup"]) if params.get("reply_markup") else None
+
+        self.replies[chat_id].append({
+            "method": method,
+            "at": time.time(),
+            "message": {**message, "reply_markup": reply_markup} if reply_markup else message,
+        })
+        self.reply_events[chat_id].set()
+
+        # Like Telegram, the returned message carries inline keyboards only
+        if reply_markup and "inline_keyboard" in reply_markup:
+            return {**message, "reply_markup": reply_markup}
+        return message
+
+    async def wait_replies(self, chat_id: int, after: int, timeout: float) -> List[dict]:
+        """Replies of a chat past index after, waiting up to timeout for the first one"""
+        event = self.reply_events[chat_id]
+        deadline = time.monotonic() + timeout
+        while len(self.replies[chat_id]) <= after:
+            event.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.replies[chat_id][after:]
+
+    def stats(self) -> dict:
+        """Counters since the last reset"""
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "calls": dict(self.calls),
+            "queued_updates": len(self.updates),
+            "chats": len(self.replies),
+            "replies": sum(len(replies) for replies in self.replies.values()),
+            "injected_429": self.injected_429,
+            "rate_limited_429": self.rate_limited_429,
+            "config": self.config.model_dump(),
+        }
+
+
+def ok(result) -> JSONResponse:
+    return JSONResponse({"ok": True, "result": result})
+
+
+def too_many_requests(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        {
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {retry_after}",
+            "parameters": {"retry_after": retry_after},
+        },
+        status_code=429
+    )
+
+
+app = FastAPI(title="Fake Telegram Bot API")
+api = FakeBotAPI()
+
+
+@app.api_route("/bot{token}/{method}", methods=["GET", "POST"])
+async def bot_method(token: str, method: str, request: Request):
+    """Answer a Bot API call"""
+    params = dict(await request.form())
+    params.update(request.query_params)
+    api.calls[method] += 1
+
+    if method == "getUpdates":
+        updates = await api.get_updates(
+            offset=int(params.get("offset", 0)),
+            limit=int(params.get("limit", 100)),
+            timeout=float(params.get("timeout", 0))
+        )
+        return ok(updates)
+
+    config = api.config
+    delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+
+    if method == "getMe":
+        return ok({"id": int(token.split(":")[0]), "is_bot": True, "first_name": "Fake", "username": "fake_bot"})
+
+    if method in REPLY_METHODS:
+        if config.error_rate and random.random() < config.error_rate:
+            api.injected_429 += 1
+            return too_many_requests(config.retry_after)
+
+        chat_id = int(params["chat_id"]) if "chat_id" in params else None
+        if api.rate_limited(chat_id):
+            api.rate_limited_429 += 1
+            return too_many_requests(config.retry_after)
+
+        return ok(api.record_reply(method, params))
+
+    # answerCallbackQuery, setWebhook, deleteWebhook and the rest just succeed
+    return ok(True)
+
+
+@app.post("/control/updates")
+async def push_updates(updates: List[dict]):
+    """Queue updates for the bot's next getUpdates"""
+    return {"update_ids": api.push_updates(updates)}
+
+
+@app.get("/control/chats/{chat_id}/replies")
+async def chat_replies(chat_id: int, after: int = 0, timeout: float = 10.0):
+    """Replies the bot sent to a chat after the given index"""
+    return {"replies": await api.wait_replies(chat_id, after, timeout)}
+
+
+@app.post("/control/config")
+async def update_config(config: FakeAPIConfig):
+    """Replace latency, error and rate limit settings"""
+    api.config = config
+    return api.config
+
+
+@app.get("/control/stats")
+async def stats():
+    return api.stats()
+
+
+@app.post("/control/reset")
+async def reset():
+    """Forget updates, replies and counters, keeping the config"""
+    api.reset()
+    return {"ok": True}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay of every call except getUpdates")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random +/- added to the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of sends answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after of 429 answers")
+    parser.add_argument("--per-chat-rate", type=float, default=0.0, help="sends per second per chat, 0 = unlimited")
+    parser.add_argument("--global-rate", type=float, default=0.0, help="sends per second in total, 0 = unlimited")
+    args = parser.parse_args()
+
+    api.config = FakeAPIConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        per_chat_rate=args.per_chat_rate,
+        global_rate=args.global_rate,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Replays /start -> add habit -> complete flows from virtual users.
+
+Start the fake Bot API, then the app with TELEGRAM_API_URL pointing at it, then:
+
+    python -m loadtest.replay --users 200 --iterations 3
+
+Every step sends one update and waits for the bot's reply to that chat; the time in
+between is the step's handler latency. With --webhook-url updates are posted to the
+app's webhook instead of the fake getUpdates queue.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import aiohttp
+
+STEPS = ("start", "add_habit", "title", "completion_list", "choose_habit", "complete")
+
+
+class StepTimeout(Exception):
+    pass
+
+
+class Replayer:
+    """Sends updates through the fake API or a webhook and collects step latencies"""
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            api_url: str,
+            webhook_url: Optional[str] = None,
+            webhook_secret: Optional[str] = None,
+            timeout: float = 30.0
+    ):
+        self.session = session
+        self.api_url = api_url.rstrip("/")
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.timeout = timeout
+
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.sent = 0
+        self.timeouts = 0
+        self.failed_flows = 0
+        # Webhook updates skip the fake queue, so ids are numbered here
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    async def send(self, update: dict) -> None:
+        if self.webhook_url:
+            update["update_id"] = next(self._update_ids)
+            headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret or ""}
+            async with self.session.post(self.webhook_url, json=update, headers=headers) as resp:
+                resp.raise_for_status()
+        else:
+            async with self.session.post(f"{self.api_url}/control/updates", json=[update]) as resp:
+                resp.raise_for_status()
+        self.sent += 1
+
+    async def replies(self, chat_id: int, after: int, timeout: float) -> List[dict]:
+        params = {"after": after, "timeout": timeout}
+        async with self.session.get(f"{self.api_url}/control/chats/{chat_id}/replies", params=params) as resp:
+            resp.raise_for_status()
+            return (await resp.json())["replies"]
+
+    async def step(self, name: str, chat_id: int, seen: int, update: dict) -> dict:
+        """Send an update, wait for the first reply and record the latency"""
+        started = time.perf_counter()
+        await self.send(update)
+        replies = await self.replies(chat_id, seen, self.timeout)
+        if not replies:
+            self.timeouts += 1
+            raise StepTimeout(f"{name}: no reply for chat {chat_id} in {self.timeout}s")
+        self.latencies[name].append(time.perf_counter() - started)
+        return replies[0]["message"]
+
+    def _user(self, chat_id: int) -> dict:
+        return {"id": chat_id, "is_bot": False, "first_name": "Load", "username": f"load{chat_id}"}
+
+    def message(self, chat_id: int, text: str) -> dict:
+        return {
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": self._user(chat_id),
+                "text": text,
+            }
+        }
+
+    def callback(self, chat_id: int, message: dict, data: str) -> dict:
+        return {
+            "callback_query": {
+                "id": str(next(self._message_ids)),
+                "from": self._user(chat_id),
+                "chat_instance": str(chat_id),
+                "message": message,
+                "data": data,
+            }
+        }
+
+    async def flow(self, chat_id: int, iteration: int) -> None:
+        """One /start -> add habit -> complete conversation"""
+        title = f"Load habit {iteration}"
+        seen = len(await self.replies(chat_id, 0, 0))
+
+        await self.step("start", chat_id, seen, self.message(chat_id, "/start"))
+        seen += 1
+        await self.step("add_habit", chat_id, seen, self.message(chat_id, "➕ Добавить привычку"))
+        seen += 1
+        await self.step("title", chat_id, seen, self.message(chat_id, title))
+        seen += 1
+        listing = await self.step("completion_list", chat_id, seen, self.message(chat_id, "✅ Отметить выполнение"))
+        seen += 1
+
+        buttons = [
+            button
+            for row in listing.get("reply_markup", {}).get("inline_keyboard", [])
+            for button in row
+            if button["text"].endswith(title)
+        ]
+        if not buttons:
+            raise RuntimeError(f"Habit '{title}' is missing from the completion list of chat {chat_id}")
+        habit_id = buttons[0]["callback_data"].split(":")[1]
+
+        await self.step("choose_habit", chat_id, seen, self.callback(chat_id, listing, f"complete_habit:{habit_id}"))
+        seen += 1
+        await self.step("complete", chat_id, seen, self.callback(chat_id, listing, f"complete_yes:{habit_id}"))
+
+    async def user(self, chat_id: int, iterations: int) -> None:
+        for iteration in range(iterations):
+            try:
+                await self.flow(chat_id, iteration)
+            except Exception as e:
+                self.failed_flows += 1
+                print(f"chat {chat_id}: {e}")
+
+    async def fake_stats(self) -> dict:
+        async with self.session.get(f"{self.api_url}/control/stats") as resp:
+            return await resp.json()
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def summarize(latencies: List[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+
+async def run(args) -> dict:
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        replayer = Replayer(session, args.api_url, args.webhook_url, args.webhook_secret, args.timeout)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            replayer.user(args.first_chat_id + i, args.iterations)
+            for i in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+
+        all_latencies = [value for values in replayer.latencies.values() for value in values]
+        return {
+            "users": args.users,
+            "iterations": args.iterations,
+            "elapsed_seconds": round(elapsed, 2),
+            "updates_sent": replayer.sent,
+            "updates_per_second": round(replayer.sent / elapsed, 1) if elapsed else 0.0,
+            "timeouts": replayer.timeouts,
+            "failed_flows": replayer.failed_flows,
+            "latency": summarize(all_latencies) if all_latencies else {},
+            "steps": {
+                name: summarize(replayer.latencies[name])
+                for name in STEPS
+                if replayer.latencies[name]
+            },
+            "fake_api": await replayer.fake_stats(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic bot conversations")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8081", help="fake Bot API address")
+    parser.add_argument("--webhook-url", help="post updates to the app's webhook instead of getUpdates")
+    parser.add_argument("--webhook-secret", help="TELEGRAM_WEBHOOK_SECRET of the app")
+    parser.add_argument("--users", type=int, default=100, help="virtual users running in parallel")
+    parser.add_argument("--iterations", type=int, default=1, help="flows per virtual user")
+    parser.add_argument("--first-chat-id", type=int, default=7_000_000_000, help="chat id of the first user")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for a reply")
+    parser.add_argument("--connections", type=int, default=200, help="HTTP connections of the replayer")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import time
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from api.api_v1.router import api_router
+from core.cache import token_cache, user_cache, user_id_cache, habits_cache, rendered_cache
 from core.config import settings
-from db.base import Base
+from core.metrics import HTTP_REQUEST_DURATION, render as render_metrics
+from core.security import shutdown_password_pool
+from core.watchdog import ActivityMiddleware, watchdog
+from db.migrations import check_schema_version
+from db.profiler import profile_scope
 from db.session import engine
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from bot.bot_instance import start_bot_polling, stop_bot
+from bot.bot_instance import bot, start_bot, stop_bot, process_webhook_update
+from notifications.outbox import outbox_worker
 from notifications.scheduler import start_scheduler, stop_scheduler
 
 
@@ -15,31 +24,45 @@ async def lifespan(app: FastAPI):
     # Startup events
     print("Starting up application...")
 
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created")
+    # Schema changes are applied by `alembic upgrade head`, not by the app
+    check_schema_version(engine)
+    print("Database schema is up to date")
+
+    if settings.LOOP_WATCHDOG_ENABLED:
+        watchdog.start()
 
     # Start Telegram bot
-    await start_bot_polling()
+    await start_bot()
     print("Telegram bot started")
 
     # Start notification scheduler
     start_scheduler()
     print("Notification scheduler started")
 
+    # Every process delivers queued notifications, whichever one queued them
+    if settings.NOTIFICATION_OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+
     yield
 
     # Shutdown events
     print("Shutting down application...")
 
+    await outbox_worker.stop()
+
     # Stop notification scheduler
-    stop_scheduler()
+    await stop_scheduler()
     print("Notification scheduler stopped")
 
     # Stop Telegram bot
     await stop_bot()
     print("Telegram bot stopped")
 
+    # Joining the worker processes blocks, keep it off the event loop
+    await asyncio.to_thread(shutdown_password_pool)
+
+    await watchdog.stop()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -56,10 +79,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added before the timing middleware so it sits inside it, in the task that runs the endpoint
+if settings.LOOP_WATCHDOG_ENABLED:
+    app.add_middleware(ActivityMiddleware)
+
 # API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """Profile the request's SQL and observe its latency per route, labelled by endpoint name"""
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        with profile_scope(f"{request.method} {request.url.path}"):
+            response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            route.name if route else "unmatched",
+            str(status_code)
+        ).observe(time.perf_counter() - started)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -73,4 +119,35 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "caches": {
+            "auth_token": token_cache.stats(),
+            "auth_user": user_cache.stats(),
+            "bot_user_id": user_id_cache.stats(),
+            "bot_habits": habits_cache.stats(),
+            "bot_rendered": rendered_cache.stats(),
+        },
+        "bot_dispatcher": bot.dispatcher.stats()
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
+@app.post(settings.TELEGRAM_WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(request: Request):
+    """Receive Telegram updates in webhook mode"""
+    if not settings.TELEGRAM_USE_WEBHOOK:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not hmac.compare_digest(secret, settings.TELEGRAM_WEBHOOK_SECRET or ""):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+    await process_webhook_update(await request.json())
+    return {"ok": True}
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, BigInteger, String, DateTime
+from models.base import Base
+
+
+class BotState(Base):
+    __tablename__ = "bot_states"
+
+    chat_id = Column(BigInteger, primary_key=True)
+    state = Column(String(64), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<BotState(chat_id={self.chat_id}, state='{self.state}')>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table
+from sqlalchemy.sql import func
+from models.base import Base
+from sqlalchemy.orm import relationship
+
+friend_group_members = Table(
+    "friend_group_members",
+    Base.metadata,
+    Column("group_id", Integer, ForeignKey("friend_groups.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True),
+)
+
+
+class FriendGroup(Base):
+    __tablename__ = "friend_groups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    invite_code = Column(String, unique=True, index=True, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    members = relationship("User", secondary=friend_group_members)
+
+    def __repr__(self) -> str:
+        return f"<FriendGroup(id={self.id}, name={self.name}, owner_id={self.owner_id})>"
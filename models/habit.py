@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from models.base import Base
 from sqlalchemy.orm import relationship
@@ -6,6 +6,12 @@ from sqlalchemy.orm import relationship
 
 class Habit(Base):
     __tablename__ = "habits"
+    __table_args__ = (
+        # Keyset pagination of a user's habits
+        Index("ix_habits_owner_id_id", "owner_id", "id"),
+        # Hot path: a user's active habits, and the notification join ordered by (owner_id, id)
+        Index("ix_habits_active_owner_id_id", "owner_id", "id", postgresql_where=text("is_active")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -13,12 +19,16 @@ class Habit(Base):
     is_active = Column(Boolean, default=True)
     completion_count = Column(Integer, default=0)
     last_completed = Column(DateTime(timezone=True), nullable=True)
+    last_completed_on = Column(Date, nullable=True)
+    current_streak = Column(Integer, default=0, server_default="0", nullable=False)
+    best_streak = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     owner = relationship("User", back_populates="habits")
+    completions = relationship("HabitCompletionLog", back_populates="habit", passive_deletes=True)
 
     def __repr__(self) -> str:
         return f"<Habit(id={self.id}, title={self.title}, owner_id={self.owner_id})>"
\ No newline at end of file
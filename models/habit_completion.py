@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from models.base import Base
+from sqlalchemy.orm import relationship
+
+
+class HabitCompletionLog(Base):
+    __tablename__ = "habit_completions"
+    __table_args__ = (
+        # One row per habit per day; the index also serves "last N days" lookups
+        UniqueConstraint("habit_id", "day", name="uq_habit_completions_habit_id_day"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    habit = relationship("Habit", back_populates="completions")
+
+    def __repr__(self) -> str:
+        return f"<HabitCompletionLog(habit_id={self.habit_id}, day={self.day})>"
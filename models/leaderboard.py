@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from models.base import Base
+
+
+class LeaderboardEntry(Base):
+    """Ranked snapshot rebuilt by the nightly job, one row per user per metric"""
+    __tablename__ = "leaderboard_entries"
+    __table_args__ = (
+        # Top N: WHERE metric = ? AND position <= N
+        PrimaryKeyConstraint("metric", "position", name="pk_leaderboard_entries"),
+        # My rank: WHERE metric = ? AND user_id = ?
+        Index("ix_leaderboard_entries_metric_user_id", "metric", "user_id", unique=True),
+    )
+
+    metric = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)
+    rank = Column(Integer, nullable=False)
+    score = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    display_name = Column(String, nullable=True)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<LeaderboardEntry(metric={self.metric}, rank={self.rank}, user_id={self.user_id})>"
@@ -0,0 +1,39 @@
+from sqlalchemy import (
+    Column, BigInteger, Integer, String, Date, DateTime, JSON, Index, UniqueConstraint, text
+)
+from sqlalchemy.sql import func
+from models.base import Base
+
+
+class NotificationOutbox(Base):
+    """Message queued for delivery; status is pending, sending, sent or failed"""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # One message of a kind per chat per local day, so re-queuing is a no-op
+        UniqueConstraint("chat_id", "kind", "day", name="uq_notification_outbox_chat_id_kind_day"),
+        # Claim query: rows still to deliver whose next attempt, or expired lease, is due
+        Index(
+            "ix_notification_outbox_claimable", "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'sending')")
+        ),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    chat_id = Column(String, nullable=False)
+    kind = Column(String(32), nullable=False)
+    day = Column(Date, nullable=False)
+    chunks = Column(JSON, nullable=False)
+    chunks_sent = Column(Integer, default=0, server_default="0", nullable=False)
+    status = Column(String(16), default="pending", server_default="pending", nullable=False)
+    # Bumped by every claim, it fences out a worker whose lease expired
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    # Failed deliveries only, rate limiting does not count; drives backoff and giving up
+    failures = Column(Integer, default=0, server_default="0", nullable=False)
+    # While sending, the end of the claiming worker's lease
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<NotificationOutbox(id={self.id}, chat_id='{self.chat_id}', status='{self.status}')>"
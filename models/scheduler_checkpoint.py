@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from models.base import Base
+
+
+class SchedulerCheckpoint(Base):
+    __tablename__ = "scheduler_checkpoints"
+
+    name = Column(String(64), primary_key=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<SchedulerCheckpoint(name='{self.name}', last_run_at={self.last_run_at})>"
@@ -1,11 +1,21 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, text
 from sqlalchemy.sql import func
 from models.base import Base
 from sqlalchemy.orm import relationship
+from core.config import settings
+from core.timeslots import default_notification_minute, format_minute
+
+
+def _default_notification_minute(context) -> int:
+    return default_notification_minute(context.get_current_parameters()["telegram_id"])
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Due-slot lookup: WHERE is_active AND (notification_minute, timezone) IN (...)
+        Index("ix_users_notification_slot", "notification_minute", "timezone", postgresql_where=text("is_active")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     telegram_id = Column(String, unique=True, index=True, nullable=False)
@@ -13,10 +23,17 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=True)
     hashed_password = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    timezone = Column(String, nullable=False, default=settings.DEFAULT_TIMEZONE, server_default=settings.DEFAULT_TIMEZONE)
+    notification_minute = Column(Integer, nullable=False, default=_default_notification_minute)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     habits = relationship("Habit", back_populates="owner", cascade="all, delete-orphan")
 
+    @property
+    def notification_time(self) -> str:
+        """Local notification time as HH:MM"""
+        return format_minute(self.notification_minute)
+
     def __repr__(self) -> str:
-        return f"<User(id={self.id}, telegram_id={self.telegram_id}, username={self.username})>"
\ No newline at end of file
+        return f"<User(id={self.id}, telegram_id={self.telegram_id}, username={self.username})>"
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import zlib
+from typing import Callable, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key shared by every process that may run the scheduler
+SCHEDULER_LOCK_KEY = zlib.crc32(b"habit_tracker.notification_scheduler")
+
+
+class LeaderElection:
+    """Run on_elected while this process holds a Postgres advisory lock, on_demoted when it is lost"""
+
+    def __init__(
+            self,
+            lock_key: int,
+            on_elected: Callable[[], None],
+            on_demoted: Callable[[], None],
+            retry_interval: float = settings.SCHEDULER_LEADER_RETRY_SECONDS
+    ):
+        self.lock_key = lock_key
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        # The lock belongs to the session, so the connection must really close when released: no pooling
+        self._engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL,
+            poolclass=NullPool,
+            isolation_level="AUTOCOMMIT"
+        )
+
+    def start(self) -> None:
+        """Start campaigning in the background"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._campaign())
+
+    async def stop(self) -> None:
+        """Step down and release the lock"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._engine.dispose()
+
+    async def _campaign(self) -> None:
+        while True:
+            try:
+                async with self._engine.connect() as connection:
+                    await self._acquire(connection)
+                    try:
+                        self._elected()
+                        # Another process can take over once this connection is gone, so keep checking it
+                        while True:
+                            await asyncio.sleep(self.retry_interval)
+                            await connection.scalar(text("SELECT 1"))
+                    finally:
+                        self._demoted()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Leader election connection failed, retrying: {e}")
+            await asyncio.sleep(self.retry_interval)
+
+    async def _acquire(self, connection) -> None:
+        while not await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}):
+            await asyncio.sleep(self.retry_interval)
+
+    def _elected(self) -> None:
+        self.is_leader = True
+        logger.info(f"Elected leader for lock {self.lock_key}")
+        self.on_elected()
+
+    def _demoted(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        logger.info(f"Gave up leadership for lock {self.lock_key}")
+        self.on_demoted()
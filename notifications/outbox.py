@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from bot.bot_instance import get_bot
+from core.activity import activity
+from core.config import settings
+from core.metrics import (
+    NOTIFICATION_OUTBOX_BATCH_DURATION,
+    NOTIFICATION_OUTBOX_IN_PROGRESS,
+    NOTIFICATION_OUTBOX_QUEUED
+)
+from crud.crud_outbox import async_outbox_crud
+from db.session import AsyncSessionLocal
+from models.notification_outbox import NotificationOutbox
+from notifications.sender import NotificationSender, OutgoingMessage, SendStats
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """Deliver queued notifications; any number of workers can run, in any number of processes.
+
+    Rows are leased with SELECT ... FOR UPDATE SKIP LOCKED, so workers never pick the same row.
+    Delivery is at least once: Telegram has no idempotency key, so a worker that dies after
+    Telegram accepted a message but before the row is marked sent leaves it to be sent again
+    once the lease expires. Enqueuing is exactly once per chat, kind and day.
+    """
+
+    def __init__(
+            self,
+            sender: NotificationSender,
+            session_factory=AsyncSessionLocal,
+            batch_size: int = settings.NOTIFICATION_OUTBOX_BATCH_SIZE,
+            poll_interval: float = settings.NOTIFICATION_OUTBOX_POLL_SECONDS,
+            lease_seconds: int = settings.NOTIFICATION_OUTBOX_LEASE_SECONDS,
+            max_retries: int = settings.NOTIFICATION_MAX_RETRIES
+    ):
+        self.sender = sender
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_retries = max_retries
+        self._slots = asyncio.Semaphore(sender.concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start polling the outbox"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info("Notification outbox worker started")
+
+    async def stop(self) -> None:
+        """Stop polling; rows of an interrupted batch are taken again by any worker once their lease expires"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Notification outbox worker stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Notification outbox batch failed: {e}")
+                claimed = 0
+            # A full batch means more is probably waiting
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> int:
+        """Claim one batch and deliver it, return how many rows were claimed"""
+        with activity("notification_outbox", "batch"):
+            async with self.session_factory() as db:
+                rows = await async_outbox_crud.claim(db, limit=self.batch_size, lease_seconds=self.lease_seconds)
+            if not rows:
+                return 0
+
+            stats = SendStats()
+            NOTIFICATION_OUTBOX_QUEUED.inc(len(rows))
+            await asyncio.gather(*(self._deliver(row, stats) for row in rows))
+
+        stats.finished_at = time.monotonic()
+        NOTIFICATION_OUTBOX_BATCH_DURATION.observe(stats.elapsed)
+        logger.info(
+            f"Notification outbox batch finished: {stats.sent} sent, {stats.failed} failed, "
+            f"{stats.retried} retried, {stats.throttled} throttled in {stats.elapsed:.1f}s "
+            f"({stats.throughput:.1f} msg/s)"
+        )
+        return len(rows)
+
+    async def _deliver(self, row: NotificationOutbox, stats: SendStats) -> None:
+        try:
+            await self._slots.acquire()
+        finally:
+            NOTIFICATION_OUTBOX_QUEUED.dec()
+        NOTIFICATION_OUTBOX_IN_PROGRESS.inc()
+        try:
+            message = OutgoingMessage(row.chat_id, row.chunks[row.chunks_sent:], attempt=row.failures)
+            result, delay = await self.sender.deliver(message)
+        finally:
+            NOTIFICATION_OUTBOX_IN_PROGRESS.dec()
+            self._slots.release()
+
+        if result == "throttled":
+            # Rate limiting is not the message's fault, so it never counts as a failure
+            status, retry_in, outcome = "pending", delay, "throttled"
+        elif result == "retry" and row.failures < self.max_retries:
+            status, retry_in, outcome = "pending", delay, "retried"
+        elif result == "retry":
+            status, retry_in, outcome = "failed", None, "failed"
+            logger.error(f"Giving up on chat {row.chat_id} after {self.max_retries} retries")
+        else:
+            status, retry_in, outcome = result, None, result
+        stats.add(outcome)
+
+        async with self.session_factory() as db:
+            owned = await async_outbox_crud.finish(
+                db, row,
+                status=status,
+                chunks_sent=len(row.chunks) - len(message.chunks),
+                retry_in=retry_in,
+                error=message.error,
+                failed=result == "retry"
+            )
+        if not owned:
+            logger.warning(f"Lease on outbox row {row.id} expired before delivery finished, it may be sent twice")
+
+
+outbox_worker = OutboxWorker(NotificationSender(get_bot()))
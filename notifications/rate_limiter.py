@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Async token bucket shared by all senders of one bot"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds"""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0
+        self._updated = now
+
+
+class ChatRateLimiter:
+    """Minimum interval between messages to the same chat"""
+
+    def __init__(self, rate: float, max_tracked: int = 10000):
+        self.interval = 1 / rate
+        self.max_tracked = max_tracked
+        self._next_allowed: Dict[str, float] = {}
+
+    async def wait(self, chat_id: str) -> None:
+        """Wait until the chat may receive another message"""
+        now = time.monotonic()
+        next_allowed = self._next_allowed.get(chat_id, now)
+        self._next_allowed[chat_id] = max(now, next_allowed) + self.interval
+
+        if len(self._next_allowed) > self.max_tracked:
+            self._prune(now)
+
+        if next_allowed > now:
+            await asyncio.sleep(next_allowed - now)
+
+    def _prune(self, now: float) -> None:
+        """Forget chats whose interval has already passed"""
+        for chat_id in [c for c, t in self._next_allowed.items() if t <= now]:
+            del self._next_allowed[chat_id]
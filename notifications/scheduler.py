@@ -1,12 +1,27 @@
+from core.config import settings
+from notifications.leader import SCHEDULER_LOCK_KEY, LeaderElection
 from services.notification_service import notification_service
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Web workers and the notification daemon all campaign, only the lock holder runs the jobs
+scheduler_leader = LeaderElection(
+    SCHEDULER_LOCK_KEY,
+    on_elected=notification_service.start,
+    on_demoted=notification_service.stop
+)
+
 def start_scheduler():
-    """Start the notification scheduler"""
-    notification_service.start()
+    """Start the notification scheduler, or campaign to run it when leader election is on"""
+    if settings.SCHEDULER_LEADER_ELECTION:
+        scheduler_leader.start()
+    else:
+        notification_service.start()
 
-def stop_scheduler():
-    """Stop the notification scheduler"""
-    notification_service.stop()
\ No newline at end of file
+async def stop_scheduler():
+    """Stop the notification scheduler and give up leadership"""
+    if settings.SCHEDULER_LEADER_ELECTION:
+        await scheduler_leader.stop()
+    else:
+        notification_service.stop()
@@ -0,0 +1,101 @@
+import logging
+import time
+from typing import Optional, Sequence, Tuple, Union
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiTelegramException
+from core.config import settings
+from core.metrics import NOTIFICATION_MESSAGES
+from notifications.rate_limiter import TokenBucket, ChatRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Telegram answers with these when the chat is gone or the bot was blocked
+PERMANENT_ERROR_CODES = {400, 403}
+
+
+class SendStats:
+    """Counters for one outbox batch"""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    def add(self, result: str) -> None:
+        """Count one message outcome, here and in the process metrics"""
+        setattr(self, result, getattr(self, result) + 1)
+        NOTIFICATION_MESSAGES.labels(result).inc()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"<SendStats(sent={self.sent}, failed={self.failed}, retried={self.retried}, "
+            f"throttled={self.throttled}, elapsed={self.elapsed:.1f}s, throughput={self.throughput:.1f}/s)>"
+        )
+
+
+class OutgoingMessage:
+    __slots__ = ("chat_id", "chunks", "attempt", "error")
+
+    def __init__(self, chat_id: str, text: Union[str, Sequence[str]], attempt: int = 0):
+        self.chat_id = chat_id
+        # Chunks not delivered yet, so a retry does not repeat the ones before the failure
+        self.chunks = [text] if isinstance(text, str) else list(text)
+        self.attempt = attempt
+        self.error: Optional[str] = None
+
+
+class NotificationSender:
+    """Send messages under the Telegram rate limits; concurrency is how many an outbox worker sends at once"""
+
+    def __init__(
+            self,
+            bot: AsyncTeleBot,
+            concurrency: int = settings.NOTIFICATION_CONCURRENCY,
+            global_rate: float = settings.TELEGRAM_GLOBAL_RATE_LIMIT,
+            per_chat_rate: float = settings.TELEGRAM_PER_CHAT_RATE_LIMIT
+    ):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_limiter = ChatRateLimiter(per_chat_rate)
+
+    async def deliver(self, message: OutgoingMessage) -> Tuple[str, Optional[float]]:
+        """Try the remaining chunks once: ("sent"|"failed", None) or ("throttled"|"retry", delay)"""
+        try:
+            while message.chunks:
+                await self.chat_limiter.wait(message.chat_id)
+                await self.global_bucket.acquire()
+                await self.bot.send_message(message.chat_id, message.chunks[0])
+                del message.chunks[0]
+            return "sent", None
+
+        except ApiTelegramException as e:
+            message.error = str(e)
+            if e.error_code == 429:
+                retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
+                self.global_bucket.pause(retry_after)
+                logger.warning(f"Telegram rate limit hit, pausing sends for {retry_after}s")
+                return "throttled", retry_after
+
+            if e.error_code in PERMANENT_ERROR_CODES:
+                logger.info(f"Skipping chat {message.chat_id}: {e.description}")
+                return "failed", None
+
+            logger.warning(f"Telegram error for chat {message.chat_id}: {e}")
+            return "retry", 2 ** message.attempt
+
+        except Exception as e:
+            message.error = str(e)
+            logger.warning(f"Error sending notification to chat {message.chat_id}: {e}")
+            return "retry", 2 ** message.attempt
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import List, Optional
+from datetime import date, datetime
+from core.config import settings
 
 
 class HabitBase(BaseModel):
@@ -13,6 +14,10 @@ class HabitCreate(HabitBase):
     pass
 
 
+class HabitBatchCreate(BaseModel):
+    habits: List[HabitCreate] = Field(..., min_length=1, max_length=settings.HABIT_BATCH_MAX_SIZE)
+
+
 class HabitUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -23,14 +28,30 @@ class HabitUpdate(BaseModel):
 class HabitResponse(HabitBase):
     id: int
     completion_count: int
+    current_streak: int = 0
+    best_streak: int = 0
     last_completed: Optional[datetime] = None
+    last_completed_on: Optional[date] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     owner_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Built once; validating a list through it avoids per-item model_validate calls
+habit_list_adapter = TypeAdapter(List[HabitResponse])
 
 
 class HabitCompletion(BaseModel):
-    completed: bool
\ No newline at end of file
+    completed: bool
+
+
+class HabitCompletionItem(BaseModel):
+    habit_id: int
+    # Day the habit was completed offline, defaults to today in the user's timezone
+    day: Optional[date] = None
+
+
+class HabitCompletionBatch(BaseModel):
+    completions: List[HabitCompletionItem] = Field(..., min_length=1, max_length=settings.HABIT_BATCH_MAX_SIZE)
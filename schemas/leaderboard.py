@@ -0,0 +1,38 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+
+
+class LeaderboardMetric(str, Enum):
+    streak = "streak"
+    completions = "completions"
+
+
+class LeaderboardEntryResponse(BaseModel):
+    user_id: int
+    display_name: Optional[str] = None
+    rank: int
+    score: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LeaderboardResponse(BaseModel):
+    metric: LeaderboardMetric
+    entries: List[LeaderboardEntryResponse] = []
+    me: Optional[LeaderboardEntryResponse] = None
+    computed_at: Optional[datetime] = None
+
+
+class FriendGroupCreate(BaseModel):
+    name: str
+
+
+class FriendGroupResponse(BaseModel):
+    id: int
+    name: str
+    invite_code: str
+    owner_id: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
 from typing import Optional, List
 from datetime import datetime
+from core.timeslots import is_valid_timezone, parse_time
 from schemas.habit import HabitResponse
 
 
@@ -18,16 +19,37 @@ class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[EmailStr] = None
     password: Optional[str] = None
+    timezone: Optional[str] = None
+    notification_time: Optional[str] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: Optional[str]) -> str:
+        # Omit the field to keep the current value, the column cannot be cleared
+        if value is None:
+            raise ValueError("Timezone cannot be null")
+        if not is_valid_timezone(value):
+            raise ValueError("Unknown timezone")
+        return value
+
+    @field_validator("notification_time")
+    @classmethod
+    def check_notification_time(cls, value: Optional[str]) -> str:
+        if value is None:
+            raise ValueError("Notification time cannot be null")
+        parse_time(value)
+        return value
 
 
 class UserResponse(UserBase):
     id: int
     is_active: bool
+    timezone: str
+    notification_time: str
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserInDB(UserResponse):
@@ -37,5 +59,4 @@ class UserInDB(UserResponse):
 class UserWithHabits(UserResponse):
     habits: List[HabitResponse] = []
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,7 +1,10 @@
 import asyncio
 import logging
-from services.notification_service import notification_service
-from bot.bot_instance import start_bot_polling, stop_bot
+from notifications.outbox import outbox_worker
+from notifications.scheduler import start_scheduler, stop_scheduler
+from bot.bot_instance import start_bot, stop_bot
+from core.config import settings
+from core.watchdog import watchdog
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,11 +18,17 @@ async def main():
     logger.info("Starting notification daemon...")
 
     try:
+        if settings.LOOP_WATCHDOG_ENABLED:
+            watchdog.start()
+
         # Start bot for sending notifications
-        await start_bot_polling()
+        await start_bot()
+
+        # Start scheduler, it runs here only while this process is the leader
+        start_scheduler()
 
-        # Start scheduler
-        notification_service.start()
+        if settings.NOTIFICATION_OUTBOX_WORKER_ENABLED:
+            outbox_worker.start()
 
         while True:
             await asyncio.sleep(3600)
@@ -29,8 +38,10 @@ async def main():
     except Exception as e:
         logger.error(f"Error in notification daemon: {e}")
     finally:
-        notification_service.stop()
+        await outbox_worker.stop()
+        await stop_scheduler()
         await stop_bot()
+        await watchdog.stop()
         logger.info("Notification daemon stopped")
 
 
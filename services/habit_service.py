@@ -1,19 +1,23 @@
-from crud.crud_user import user_crud
-from crud.crud_habit import habit_crud
-from schemas.user import UserCreate
+from crud.crud_user import async_user_crud
+from crud.crud_habit import async_habit_crud
+from crud.crud_leaderboard import async_leaderboard_crud
+from schemas.user import UserCreate, UserUpdate
 from schemas.habit import HabitCreate, HabitUpdate
-from db.session import SessionLocal
-from typing import List, Optional
+from schemas.leaderboard import LeaderboardMetric
+from core.cache import habits_cache, user_id_cache
+from db.session import AsyncSessionLocal
+from typing import List, Optional, Tuple
 from models.user import User
 from models.habit import Habit
+from models.leaderboard import LeaderboardEntry
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class HabitService:
-    def __init__(self):
-        self.db = SessionLocal()
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
 
     async def get_or_create_user(
             self,
@@ -24,27 +28,64 @@ class HabitService:
     ) -> User:
         """Get or create user by telegram ID"""
         try:
-            user = user_crud.get_by_telegram_id(self.db, telegram_id=telegram_id)
+            async with self.session_factory() as db:
+                user = await async_user_crud.get_by_telegram_id(db, telegram_id=telegram_id)
 
-            if not user:
-                user_in = UserCreate(
-                    telegram_id=telegram_id,
-                    username=username or full_name,
-                    email=email
-                )
-                user = user_crud.create(self.db, obj_in=user_in)
-                logger.info(f"Created new user with telegram_id: {telegram_id}")
+                if not user:
+                    user_in = UserCreate(
+                        telegram_id=telegram_id,
+                        username=username or full_name,
+                        email=email
+                    )
+                    user = await async_user_crud.create(db, obj_in=user_in)
+                    logger.info(f"Created new user with telegram_id: {telegram_id}")
 
-            return user
+                user_id_cache.set(telegram_id, user.id)
+                return user
 
         except Exception as e:
             logger.error(f"Error getting or creating user: {e}")
             raise
 
+    async def get_user_id(self, telegram_id: str, username: Optional[str] = None) -> int:
+        """Get user ID by telegram ID, creating the user on first contact"""
+        user_id = user_id_cache.get(telegram_id)
+        if user_id is None:
+            user = await self.get_or_create_user(telegram_id=telegram_id, username=username)
+            user_id = user.id
+        return user_id
+
+    async def update_user_schedule(
+            self,
+            telegram_id: str,
+            timezone: Optional[str] = None,
+            notification_time: Optional[str] = None
+    ) -> User:
+        """Update user's timezone and/or notification time"""
+        try:
+            fields = {"timezone": timezone, "notification_time": notification_time}
+            user_in = UserUpdate(**{k: v for k, v in fields.items() if v is not None})
+
+            async with self.session_factory() as db:
+                user = await async_user_crud.get_by_telegram_id(db, telegram_id=telegram_id)
+                if not user:
+                    raise ValueError("User not found")
+
+                return await async_user_crud.update(db, db_obj=user, obj_in=user_in)
+
+        except Exception as e:
+            logger.error(f"Error updating user schedule: {e}")
+            raise
+
     async def get_user_habits(self, user_id: int) -> List[Habit]:
         """Get active habits for user"""
         try:
-            return habit_crud.get_active_by_user(self.db, user_id=user_id)
+            habits = habits_cache.get(user_id)
+            if habits is None:
+                async with self.session_factory() as db:
+                    habits = await async_habit_crud.get_active_by_user(db, user_id=user_id)
+                habits_cache.set(user_id, habits)
+            return list(habits)
         except Exception as e:
             logger.error(f"Error getting user habits: {e}")
             raise
@@ -62,7 +103,8 @@ class HabitService:
                 description=description,
                 is_active=True
             )
-            return habit_crud.create(self.db, obj_in=habit_in, owner_id=user_id)
+            async with self.session_factory() as db:
+                return await async_habit_crud.create(db, obj_in=habit_in, owner_id=user_id)
         except Exception as e:
             logger.error(f"Error creating habit: {e}")
             raise
@@ -75,14 +117,17 @@ class HabitService:
     ) -> Habit:
         """Mark habit"""
         try:
-            habit = habit_crud.get(self.db, habit_id=habit_id)
-            if not habit:
-                raise ValueError("Habit not found")
-
-            if habit.owner_id != user_id:
-                raise ValueError("Not enough permissions")
-
-            return habit_crud.mark_completed(self.db, habit_id=habit_id, completed=completed)
+            async with self.session_factory() as db:
+                # Ownership check, write and read-back happen in one statement
+                habit = await async_habit_crud.mark_completed(
+                    db,
+                    habit_id=habit_id,
+                    owner_id=user_id,
+                    completed=completed
+                )
+                if not habit:
+                    raise ValueError("Habit not found")
+                return habit
 
         except Exception as e:
             logger.error(f"Error marking habit completed: {e}")
@@ -91,14 +136,15 @@ class HabitService:
     async def delete_habit(self, habit_id: int, user_id: int) -> None:
         """Delete habit"""
         try:
-            habit = habit_crud.get(self.db, habit_id=habit_id)
-            if not habit:
-                raise ValueError("Habit not found")
+            async with self.session_factory() as db:
+                habit = await async_habit_crud.get(db, habit_id=habit_id)
+                if not habit:
+                    raise ValueError("Habit not found")
 
-            if habit.owner_id != user_id:
-                raise ValueError("Not enough permissions")
+                if habit.owner_id != user_id:
+                    raise ValueError("Not enough permissions")
 
-            habit_crud.remove(self.db, habit_id=habit_id)
+                await async_habit_crud.remove(db, habit_id=habit_id)
 
         except Exception as e:
             logger.error(f"Error deleting habit: {e}")
@@ -107,33 +153,55 @@ class HabitService:
     async def get_active_habits_count(self, telegram_id: str) -> int:
         """Get count of active habits for user"""
         try:
-            user = user_crud.get_by_telegram_id(self.db, telegram_id=telegram_id)
-            if not user:
-                return 0
+            user_id = user_id_cache.get(telegram_id)
+            if user_id is None:
+                async with self.session_factory() as db:
+                    user = await async_user_crud.get_by_telegram_id(db, telegram_id=telegram_id)
+                if not user:
+                    return 0
+                user_id = user.id
+                user_id_cache.set(telegram_id, user_id)
 
-            habits = habit_crud.get_active_by_user(self.db, user_id=user.id)
-            return len(habits)
+            return len(await self.get_user_habits(user_id))
 
         except Exception as e:
             logger.error(f"Error getting active habits count: {e}")
             return 0
 
-    async def process_daily_habits(self) -> None:
-        """Process daily habits"""
+    async def reset_stale_streaks(self) -> None:
+        """Reset streaks of habits missed yesterday"""
         try:
-            users = self.db.query(User).all()
-            completion_days = int(settings.HABIT_COMPLETION_DAYS)
+            async with self.session_factory() as db:
+                reset = await async_habit_crud.reset_stale_streaks(db)
 
-            for user in users:
-                habits_to_continue = habit_crud.get_habits_to_continue(
-                    self.db, user_id=user.id, completion_days=completion_days
-                )
+            if reset:
+                logger.info(f"Reset {reset} stale habit streaks")
+
+        except Exception as e:
+            logger.error(f"Error resetting habit streaks: {e}")
+            raise
+
+    async def get_leaderboard(
+            self, user_id: int, metric: LeaderboardMetric = LeaderboardMetric.streak, limit: int = 10
+    ) -> Tuple[List[LeaderboardEntry], Optional[LeaderboardEntry]]:
+        """Get top entries and the user's own entry"""
+        try:
+            async with self.session_factory() as db:
+                top = await async_leaderboard_crud.get_top(db, metric, limit=limit)
+                me = await async_leaderboard_crud.get_for_user(db, metric, user_id=user_id)
+                return top, me
+        except Exception as e:
+            logger.error(f"Error getting leaderboard: {e}")
+            raise
 
-                for habit in habits_to_continue:
-                    pass
+    async def process_daily_habits(self) -> None:
+        """Process daily habits"""
+        try:
+            async with self.session_factory() as db:
+                await async_leaderboard_crud.rebuild(db)
 
             logger.info("Daily habits processing completed")
 
         except Exception as e:
             logger.error(f"Error processing daily habits: {e}")
-            raise
\ No newline at end of file
+            raise
@@ -1,14 +1,30 @@
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from core.config import settings
-from bot.bot_instance import get_bot
+from core.metrics import track_job
+from bot.state_store import state_store
+from bot.templates import DAILY_NOTIFICATION
+from crud.crud_habit import async_habit_crud
+from crud.crud_outbox import async_outbox_crud
+from crud.crud_scheduler import async_checkpoint_crud
+from crud.crud_user import async_user_crud
+from core.timeslots import due_slot_days
+from db.session import AsyncSessionLocal
 from services.habit_service import HabitService
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
-scheduler = AsyncIOScheduler()
+
+# Jobs and their next run times live in the database, so a restarted leader runs what it missed.
+# Runs later than the grace are skipped; coalesce runs a job once however many times it was missed.
+scheduler = AsyncIOScheduler(
+    jobstores={"default": SQLAlchemyJobStore(url=settings.DATABASE_URL, engine_options={"pool_pre_ping": True})},
+    job_defaults={"coalesce": True, "misfire_grace_time": settings.SCHEDULER_MISFIRE_GRACE_SECONDS}
+)
 habit_service = HabitService()
-bot = get_bot()
 
 
 class NotificationService:
@@ -18,27 +34,14 @@ class NotificationService:
     def start(self):
         """Start scheduler"""
         if not self.scheduler.running:
-            # Schedule daily notification
-            notification_time = settings.NOTIFICATION_TIME.split(":")
-            hour = int(notification_time[0])
-            minute = int(notification_time[1])
-
-            self.scheduler.add_job(
-                self.send_daily_notifications,
-                CronTrigger(hour=hour, minute=minute),
-                id="daily_notifications",
-                replace_existing=True
-            )
-
-            # Schedule daily habits processing at midnight
-            self.scheduler.add_job(
-                self.process_daily_habits,
-                CronTrigger(hour=0, minute=0),
-                id="daily_habits_processing",
-                replace_existing=True
-            )
-
-            self.scheduler.start()
+            # Paused until the stored jobs are checked against the current definitions
+            self.scheduler.start(paused=True)
+            for func, trigger, job_id, options in JOBS:
+                job = self.scheduler.get_job(job_id)
+                # A stored job is left alone, so its past next run time is caught up on resume
+                if job is None or job.func is not func or str(job.trigger) != str(trigger):
+                    self.scheduler.add_job(func, trigger, id=job_id, replace_existing=True, **options)
+            self.scheduler.resume()
             logger.info("Notification scheduler started")
 
     def stop(self):
@@ -47,50 +50,117 @@ class NotificationService:
             self.scheduler.shutdown()
             logger.info("Notification scheduler stopped")
 
-    async def send_daily_notifications(self):
-        """Send daily notifications to all users"""
-        try:
-            users = self.db.query(User).all()
+    @track_job("due_notifications")
+    async def send_due_notifications(self, now: Optional[datetime] = None):
+        """Queue daily notifications of users whose slot is due, including minutes no process handled"""
+        now = (now or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+
+        # Reading and inserting go through separate connections, the read is a server-side cursor
+        async with AsyncSessionLocal() as db, AsyncSessionLocal() as outbox_db:
+            checkpoint = await async_checkpoint_crud.get(db, name="due_notifications")
+            minutes = self._due_minutes(checkpoint, now)
+            if not minutes:
+                return
+            slot_days = due_slot_days(minutes, await async_user_crud.get_timezones(db))
+            queued = await async_outbox_crud.enqueue(outbox_db, self._daily_messages(db, slot_days))
+            # Only after queuing: a crashed run is repeated, and the outbox ignores what it already has
+            await async_checkpoint_crud.advance(outbox_db, name="due_notifications", to=now)
+
+        if len(minutes) > 1:
+            logger.info(f"Caught up on {len(minutes) - 1} missed notification minutes since {minutes[0]:%H:%M} UTC")
+        if queued:
+            logger.info(f"Daily notifications for {now:%H:%M} UTC queued for {queued} users")
+
+    def _due_minutes(self, checkpoint: Optional[datetime], now: datetime) -> List[datetime]:
+        """Minutes after the checkpoint up to now, at most the misfire grace back"""
+        if checkpoint is None:
+            return [now]
+
+        earliest = now - timedelta(seconds=settings.SCHEDULER_MISFIRE_GRACE_SECONDS)
+        minute = max(checkpoint + timedelta(minutes=1), earliest)
+        minutes = []
+        while minute <= now:
+            minutes.append(minute)
+            minute += timedelta(minutes=1)
+        return minutes
+
+    async def _daily_messages(self, db, slot_days):
+        """Yield an outbox row per user from one streaming query"""
+        async for owner, habits in async_habit_crud.stream_active_by_owner(db, slots=list(slot_days)):
+            yield {
+                "chat_id": owner.telegram_id,
+                "kind": "daily",
+                "day": slot_days[(owner.timezone, owner.notification_minute)],
+                "chunks": list(self._format_daily_notification(habits)),
+            }
+
+    @track_job("daily_habits_processing")
+    async def process_daily_habits(self):
+        """Process daily habits"""
+        await habit_service.process_daily_habits()
+        logger.info("Daily habits processing completed")
+
+    @track_job("streak_reset")
+    async def reset_stale_streaks(self):
+        """Reset stale habit streaks"""
+        await habit_service.reset_stale_streaks()
+
+    @track_job("outbox_purge")
+    async def purge_outbox(self):
+        """Delete old delivered and failed outbox rows"""
+        async with AsyncSessionLocal() as db:
+            before = datetime.now(timezone.utc) - timedelta(days=settings.NOTIFICATION_OUTBOX_RETENTION_DAYS)
+            purged = await async_outbox_crud.purge(db, before=before)
+        if purged:
+            logger.info(f"Purged {purged} old notification outbox rows")
+
+    @track_job("bot_state_purge")
+    async def purge_expired_states(self):
+        """Delete expired bot conversation states"""
+        purged = await state_store.purge_expired()
+        if purged:
+            logger.info(f"Purged {purged} expired bot states")
+
+    def _format_daily_notification(self, habits: list) -> Tuple[str, ...]:
+        """Daily notification message, in chunks under the Telegram limit"""
+        return DAILY_NOTIFICATION.render(habits)
 
-            for user in users:
-                habits = await habit_service.get_user_habits(user.id)
 
-                if habits:
-                    message = self._format_daily_notification(habits)
-                    await bot.send_message(user.telegram_id, message)
+# Singleton
+notification_service = NotificationService()
 
-            logger.info(f"Daily notifications sent to {len(users)} users")
 
-        except Exception as e:
-            logger.error(f"Error sending daily notifications: {e}")
+# The job store keeps jobs by reference, so jobs are module-level functions, not bound methods
+async def run_due_notifications():
+    await notification_service.send_due_notifications()
 
-    async def process_daily_habits(self):
-        """Process daily habits"""
-        try:
-            await habit_service.process_daily_habits()
-            logger.info("Daily habits processing completed")
-        except Exception as e:
-            logger.error(f"Error processing daily habits: {e}")
 
-    def _format_daily_notification(self, habits: list) -> str:
-        """Daily notification message"""
-        message = "🌅 Доброе утро! Время для ваших привычек:\n\n"
+async def run_daily_habits_processing():
+    await notification_service.process_daily_habits()
 
-        for i, habit in enumerate(habits, 1):
-            progress = f"{habit.completion_count}/{settings.HABIT_COMPLETION_DAYS}"
-            message += f"{i}. {habit.title}\n   📊 Прогресс: {progress}\n"
 
-            if habit.description:
-                message += f"   💡 {habit.description}\n"
-            message += "\n"
+async def run_streak_reset():
+    await notification_service.reset_stale_streaks()
 
-        message += (
-            "✅ Отметьте выполнение привычек в боте!\n"
-            "💪 Постоянство - ключ к успеху!"
-        )
 
-        return message
+async def run_bot_state_purge():
+    await notification_service.purge_expired_states()
 
 
-# Singleton
-notification_service = NotificationService()
\ No newline at end of file
+async def run_outbox_purge():
+    await notification_service.purge_outbox()
+
+
+# (job, trigger, id, options)
+JOBS = [
+    # Every minute notify the users whose local slot is due
+    (run_due_notifications, CronTrigger(minute="*"), "due_notifications", {"max_instances": 5}),
+    # Daily habits processing at midnight
+    (run_daily_habits_processing, CronTrigger(hour=0, minute=0), "daily_habits_processing", {}),
+    # Hourly, so streaks reset soon after midnight in every timezone
+    (run_streak_reset, CronTrigger(minute=5), "streak_reset", {}),
+    # Drop abandoned conversation states
+    (run_bot_state_purge, CronTrigger(minute="*/15"), "bot_state_purge", {}),
+    # Keep the outbox small, delivered rows are only needed for a few days
+    (run_outbox_purge, CronTrigger(hour=3, minute=30), "outbox_purge", {}),
+]
\ No newline at end of file